@@ -0,0 +1,26 @@
+"""
+Клиент Checkpoint API.
+
+    from checkpoint_client import CheckpointClient
+
+    with CheckpointClient("http://localhost", "admin", "checkpoint2025") as client:
+        checkpoints = client.get_checkpoints(client.get_checkpoint_ids())
+
+CheckpointClient - синхронный клиент на requests.Session с пулом соединений.
+AsyncCheckpointClient - клиент на asyncio (нужен aiohttp).
+Оба клиента параллельно загружают пункты пропуска по списку ID и могут
+кэшировать ответы (TTLCache) с повторной проверкой по ETag / Last-Modified.
+"""
+
+from checkpoint_client.async_client import AsyncCheckpointClient
+from checkpoint_client.base import CheckpointAPIError, ClientConfig
+from checkpoint_client.cache import TTLCache
+from checkpoint_client.sync_client import CheckpointClient
+
+__all__ = [
+    'AsyncCheckpointClient',
+    'CheckpointAPIError',
+    'CheckpointClient',
+    'ClientConfig',
+    'TTLCache',
+]
@@ -0,0 +1,131 @@
+"""
+Асинхронный клиент Checkpoint API на aiohttp.
+
+aiohttp - необязательная зависимость и импортируется при создании
+клиента. Одна ClientSession с ограниченным TCPConnector держит пул
+соединений; get_checkpoints выполняет запросы конкурентно с лимитом
+одновременных запросов (семафор).
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from checkpoint_client.base import (CHECKPOINT_IDS_PATH, CHECKPOINTS_PATH, HEALTH_PATH,
+                                    STATS_PATH, CheckpointAPIError, ClientConfig,
+                                    checkpoint_path, error_message)
+from checkpoint_client.cache import TTLCache
+
+
+class AsyncCheckpointClient:
+    """Асинхронный клиент Checkpoint API с пулом соединений и опциональным кэшем"""
+
+    def __init__(self, base_url: Optional[str] = None, username: Optional[str] = None,
+                 password: Optional[str] = None, config: Optional[ClientConfig] = None,
+                 cache: Optional[TTLCache] = None):
+        try:
+            import aiohttp
+        except ImportError as e:
+            raise RuntimeError("Для асинхронного клиента установите aiohttp") from e
+        self._aiohttp = aiohttp
+
+        self.config = config or ClientConfig.from_env()
+        if base_url is not None:
+            self.config.base_url = base_url
+        if username is not None:
+            self.config.username = username
+        if password is not None:
+            self.config.password = password
+
+        if cache is None and self.config.cache_ttl > 0:
+            cache = TTLCache(ttl=self.config.cache_ttl)
+        self.cache = cache
+        self._session = None
+
+    @property
+    def session(self):
+        """Сессия создается лениво внутри работающего цикла событий"""
+        if self._session is None:
+            aiohttp = self._aiohttp
+            self._session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.config.username, self.config.password),
+                connector=aiohttp.TCPConnector(limit=self.config.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+            )
+        return self._session
+
+    async def __aenter__(self) -> 'AsyncCheckpointClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_json(self, path: str, use_cache: bool = True) -> Any:
+        """GET-запрос с разбором JSON и учетом кэша"""
+        url = self.config.url(path)
+        cache = self.cache if use_cache else None
+        entry = cache.get(url) if cache is not None else None
+        if entry is not None and entry.is_fresh(time.monotonic()):
+            return entry.data
+
+        headers = entry.validators() if entry is not None else None
+        try:
+            async with self.session.get(url, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    return cache.refresh(url, entry, response.headers)
+                if response.status != 200:
+                    raise CheckpointAPIError(response.status, url, error_message(await response.text()))
+                data = await response.json(content_type=None)
+                if cache is not None:
+                    cache.put(url, data, response.headers)
+                return data
+        except (self._aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise CheckpointAPIError(0, url, str(e) or type(e).__name__) from e
+
+    async def health(self) -> Dict:
+        """Статус системы (без кэша)"""
+        return await self.get_json(HEALTH_PATH, use_cache=False)
+
+    async def list_checkpoints(self) -> Dict:
+        """Все пункты пропуска: {'checkpoints': [...], 'total': N}"""
+        return await self.get_json(CHECKPOINTS_PATH)
+
+    async def get_checkpoint_ids(self) -> List[str]:
+        """Список ID пунктов пропуска"""
+        return (await self.get_json(CHECKPOINT_IDS_PATH)).get('ids') or []
+
+    async def get_checkpoint(self, checkpoint_id) -> Dict:
+        """Данные одного пункта пропуска"""
+        return await self.get_json(checkpoint_path(checkpoint_id))
+
+    async def get_stats(self) -> Dict:
+        """Сводная статистика"""
+        return await self.get_json(STATS_PATH)
+
+    async def get_checkpoints(self, checkpoint_ids: Iterable, concurrency: Optional[int] = None,
+                              raise_errors: bool = False) -> Dict[str, Optional[Dict]]:
+        """
+        Конкурентная загрузка пунктов пропуска по списку ID.
+
+        Возвращает словарь {id: данные}; для ненайденных и недоступных
+        пунктов значение None (или исключение при raise_errors=True).
+        """
+        checkpoint_ids = [str(checkpoint_id) for checkpoint_id in dict.fromkeys(checkpoint_ids)]
+        semaphore = asyncio.Semaphore(min(concurrency or self.config.pool_size, self.config.pool_size))
+
+        async def fetch(checkpoint_id: str) -> Optional[Dict]:
+            async with semaphore:
+                try:
+                    return await self.get_checkpoint(checkpoint_id)
+                except CheckpointAPIError:
+                    if raise_errors:
+                        raise
+                    return None
+
+        results = await asyncio.gather(*(fetch(checkpoint_id) for checkpoint_id in checkpoint_ids))
+        return dict(zip(checkpoint_ids, results))
@@ -0,0 +1,67 @@
+"""
+Общие настройки и ошибки клиентов Checkpoint API.
+
+Переменные окружения (ClientConfig.from_env):
+    CHECKPOINT_API_URL       - адрес API (по умолчанию http://localhost)
+    CHECKPOINT_API_USERNAME  - логин Basic Auth (по умолчанию admin)
+    CHECKPOINT_API_PASSWORD  - пароль Basic Auth
+    CHECKPOINT_API_TIMEOUT   - таймаут запроса в секундах (по умолчанию 10)
+    CHECKPOINT_API_POOL_SIZE - размер пула соединений (по умолчанию 10)
+    CHECKPOINT_API_CACHE_TTL - время жизни кэша в секундах (0 - без кэша)
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+HEALTH_PATH = '/health'
+CHECKPOINTS_PATH = '/api/v1/checkpoints'
+CHECKPOINT_IDS_PATH = '/api/v1/checkpoints/ids'
+STATS_PATH = '/api/v1/stats'
+
+
+def checkpoint_path(checkpoint_id) -> str:
+    """Путь к пункту пропуска по ID"""
+    return f"{CHECKPOINTS_PATH}/{checkpoint_id}"
+
+
+class CheckpointAPIError(Exception):
+    """Ошибка ответа API"""
+
+    def __init__(self, status: int, url: str, message: str = ''):
+        self.status = status
+        self.url = url
+        self.message = message
+        super().__init__(f"{status} {url}: {message}" if message else f"{status} {url}")
+
+
+@dataclass
+class ClientConfig:
+    """Настройки подключения к API"""
+    base_url: str = 'http://localhost'
+    username: str = 'admin'
+    password: str = ''
+    timeout: float = 10.0
+    pool_size: int = 10
+    cache_ttl: float = 0.0
+
+    @classmethod
+    def from_env(cls) -> 'ClientConfig':
+        return cls(
+            base_url=os.getenv('CHECKPOINT_API_URL', 'http://localhost'),
+            username=os.getenv('CHECKPOINT_API_USERNAME', 'admin'),
+            password=os.getenv('CHECKPOINT_API_PASSWORD', ''),
+            timeout=float(os.getenv('CHECKPOINT_API_TIMEOUT', '10')),
+            pool_size=int(os.getenv('CHECKPOINT_API_POOL_SIZE', '10')),
+            cache_ttl=float(os.getenv('CHECKPOINT_API_CACHE_TTL', '0')),
+        )
+
+    def url(self, path: str) -> str:
+        return self.base_url.rstrip('/') + path
+
+
+def error_message(body: Optional[str]) -> str:
+    """Короткий текст ошибки из тела ответа"""
+    if not body:
+        return ''
+    return body.strip()[:200]
@@ -0,0 +1,126 @@
+"""
+TTL-кэш ответов API с учетом валидаторов HTTP.
+
+Свежая запись возвращается без запроса. Для устаревшей записи с ETag
+или Last-Modified клиент отправляет условный запрос (If-None-Match /
+If-Modified-Since) и при ответе 304 продлевает запись, не загружая тело
+заново. Cache-Control: no-store отключает кэширование ответа, max-age
+задает время жизни вместо ttl по умолчанию.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+MAX_AGE_PATTERN = re.compile(r'max-age\s*=\s*(\d+)')
+
+
+@dataclass
+class CacheEntry:
+    """Закэшированный ответ"""
+    data: Any
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Заголовки условного запроса"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class TTLCache:
+    """Потокобезопасный LRU-кэш с временем жизни записей"""
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Запись по ключу (свежая или устаревшая, но с валидаторами)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.is_fresh(time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry.etag or entry.last_modified:
+                return entry
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+    def entry_ttl(self, headers: Mapping[str, str]) -> Optional[float]:
+        """Время жизни ответа по Cache-Control (None - не кэшировать)"""
+        cache_control = (headers.get('Cache-Control') or '').lower()
+        if 'no-store' in cache_control:
+            return None
+        match = MAX_AGE_PATTERN.search(cache_control)
+        if match:
+            return float(match.group(1))
+        return self.ttl
+
+    def put(self, key: str, data: Any, headers: Mapping[str, str]):
+        """Сохранение ответа 200"""
+        ttl = self.entry_ttl(headers)
+        if ttl is None:
+            self.discard(key)
+            return
+        entry = CacheEntry(
+            data=data,
+            expires_at=time.monotonic() + ttl,
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key: str, entry: CacheEntry, headers: Mapping[str, str]) -> Any:
+        """Продление записи после ответа 304"""
+        ttl = self.entry_ttl(headers)
+        with self._lock:
+            self.revalidated += 1
+            entry.expires_at = time.monotonic() + (ttl if ttl is not None else 0)
+            if headers.get('ETag'):
+                entry.etag = headers['ETag']
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+        return entry.data
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated
+            }
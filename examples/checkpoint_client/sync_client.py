@@ -0,0 +1,128 @@
+"""
+Синхронный клиент Checkpoint API.
+
+Все запросы идут через одну requests.Session: соединения (и TLS-сессии)
+переиспользуются пулом urllib3, авторизация задается один раз.
+get_checkpoints загружает пункты пропуска параллельно в пуле потоков,
+размер которого не превышает размер пула соединений.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from checkpoint_client.base import (CHECKPOINT_IDS_PATH, CHECKPOINTS_PATH, HEALTH_PATH,
+                                    STATS_PATH, CheckpointAPIError, ClientConfig,
+                                    checkpoint_path, error_message)
+from checkpoint_client.cache import TTLCache
+
+
+class CheckpointClient:
+    """Клиент Checkpoint API с пулом соединений и опциональным кэшем"""
+
+    def __init__(self, base_url: Optional[str] = None, username: Optional[str] = None,
+                 password: Optional[str] = None, config: Optional[ClientConfig] = None,
+                 cache: Optional[TTLCache] = None, retries: int = 2):
+        self.config = config or ClientConfig.from_env()
+        if base_url is not None:
+            self.config.base_url = base_url
+        if username is not None:
+            self.config.username = username
+        if password is not None:
+            self.config.password = password
+
+        if cache is None and self.config.cache_ttl > 0:
+            cache = TTLCache(ttl=self.config.cache_ttl)
+        self.cache = cache
+
+        self.session = requests.Session()
+        self.session.auth = (self.config.username, self.config.password)
+        # Повторяем только идемпотентные GET при сетевых ошибках и 502/503/504
+        retry = Retry(total=retries, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset(['GET']), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.pool_size,
+                              max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self) -> 'CheckpointClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def get_json(self, path: str, use_cache: bool = True) -> Any:
+        """GET-запрос с разбором JSON и учетом кэша"""
+        url = self.config.url(path)
+        cache = self.cache if use_cache else None
+        entry = cache.get(url) if cache is not None else None
+        if entry is not None and entry.is_fresh(time.monotonic()):
+            return entry.data
+
+        headers = entry.validators() if entry is not None else None
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.config.timeout)
+        except requests.RequestException as e:
+            raise CheckpointAPIError(0, url, str(e)) from e
+
+        if response.status_code == 304 and entry is not None:
+            return cache.refresh(url, entry, response.headers)
+        if response.status_code != 200:
+            raise CheckpointAPIError(response.status_code, url, error_message(response.text))
+
+        data = response.json()
+        if cache is not None:
+            cache.put(url, data, response.headers)
+        return data
+
+    def health(self) -> Dict:
+        """Статус системы (без кэша)"""
+        return self.get_json(HEALTH_PATH, use_cache=False)
+
+    def list_checkpoints(self) -> Dict:
+        """Все пункты пропуска: {'checkpoints': [...], 'total': N}"""
+        return self.get_json(CHECKPOINTS_PATH)
+
+    def get_checkpoint_ids(self) -> List[str]:
+        """Список ID пунктов пропуска"""
+        return self.get_json(CHECKPOINT_IDS_PATH).get('ids') or []
+
+    def get_checkpoint(self, checkpoint_id) -> Dict:
+        """Данные одного пункта пропуска"""
+        return self.get_json(checkpoint_path(checkpoint_id))
+
+    def get_stats(self) -> Dict:
+        """Сводная статистика"""
+        return self.get_json(STATS_PATH)
+
+    def get_checkpoints(self, checkpoint_ids: Iterable, max_workers: Optional[int] = None,
+                        raise_errors: bool = False) -> Dict[str, Optional[Dict]]:
+        """
+        Параллельная загрузка пунктов пропуска по списку ID.
+
+        Возвращает словарь {id: данные}; для ненайденных и недоступных
+        пунктов значение None (или исключение при raise_errors=True).
+        """
+        checkpoint_ids = [str(checkpoint_id) for checkpoint_id in dict.fromkeys(checkpoint_ids)]
+        if not checkpoint_ids:
+            return {}
+
+        def fetch(checkpoint_id: str) -> Optional[Dict]:
+            try:
+                return self.get_checkpoint(checkpoint_id)
+            except CheckpointAPIError:
+                if raise_errors:
+                    raise
+                return None
+
+        workers = min(max_workers or self.config.pool_size, self.config.pool_size, len(checkpoint_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(fetch, checkpoint_ids))
+        return dict(zip(checkpoint_ids, results))
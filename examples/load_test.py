@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Нагрузочное тестирование Checkpoint API.
+
+Запросы к тем же эндпоинтам, что проверяет test_api.py, выполняются
+параллельно в нескольких потоках с общим пулом соединений в течение
+заданного времени. Поддерживаются целевая частота запросов и смесь
+эндпоинтов с весами. В отчете: p50/p95/p99 задержки, пропускная
+способность и ошибки по статусам.
+
+При заданной частоте (--rate) задержка считается от запланированного
+момента отправки, а не от фактического. Поэтому очередь перед
+перегруженным сервером попадает в задержку, а не прячется от замера.
+
+Примеры:
+    python load_test.py --concurrency 20 --duration 30
+    python load_test.py --rate 100 --mix health:1,checkpoints:1,stats:1,checkpoint:5
+    python load_test.py --json --output results.json
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from checkpoint_client import CheckpointClient, ClientConfig
+from checkpoint_client.base import (CHECKPOINT_IDS_PATH, CHECKPOINTS_PATH, HEALTH_PATH,
+                                    STATS_PATH, checkpoint_path)
+
+# Конфигурация
+API_BASE_URL = "http://localhost"
+API_USERNAME = "admin"
+API_PASSWORD = "checkpoint2025"  # Измените на ваш пароль
+
+ENDPOINTS = {
+    'health': HEALTH_PATH,
+    'checkpoints': CHECKPOINTS_PATH,
+    'ids': CHECKPOINT_IDS_PATH,
+    'stats': STATS_PATH,
+    'checkpoint': None,  # случайный ID из /api/v1/checkpoints/ids
+}
+
+DEFAULT_MIX = 'health:1,checkpoints:1,stats:1,checkpoint:3'
+
+
+def parse_mix(text: str) -> List[Tuple[str, float]]:
+    """Разбор смеси эндпоинтов вида name:weight,name:weight"""
+    mix = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition(':')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Неизвестный эндпоинт: {name} (доступны: {', '.join(ENDPOINTS)})")
+        weight = float(weight) if weight else 1.0
+        if weight > 0:
+            mix.append((name, weight))
+    if not mix:
+        raise ValueError("Пустая смесь эндпоинтов")
+    return mix
+
+
+def percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """Перцентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class EndpointStats:
+    """Результаты по одному эндпоинту"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def record(self, latency: float, status: Optional[int], error: Optional[str]):
+        self.latencies.append(latency)
+        if status is not None:
+            self.statuses[str(status)] += 1
+        if error is not None:
+            self.errors[error] += 1
+
+    def merge(self, other: 'EndpointStats'):
+        self.latencies.extend(other.latencies)
+        self.statuses.update(other.statuses)
+        self.errors.update(other.errors)
+
+    def to_dict(self, elapsed: float) -> Dict:
+        latencies = sorted(self.latencies)
+        requests_count = len(latencies)
+        errors_count = sum(self.errors.values())
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            'requests': requests_count,
+            'errors': errors_count,
+            'error_rate': round(errors_count / requests_count, 4) if requests_count else 0.0,
+            'throughput_rps': round(requests_count / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {
+                'min': ms(latencies[0] if latencies else None),
+                'mean': ms(sum(latencies) / requests_count if requests_count else None),
+                'p50': ms(percentile(latencies, 50)),
+                'p95': ms(percentile(latencies, 95)),
+                'p99': ms(percentile(latencies, 99)),
+                'max': ms(latencies[-1] if latencies else None),
+            },
+            'statuses': dict(sorted(self.statuses.items())),
+            'error_breakdown': dict(self.errors.most_common()),
+        }
+
+
+class LoadTest:
+    """Генератор нагрузки на пуле потоков с общей сессией"""
+
+    def __init__(self, client: CheckpointClient, mix: List[Tuple[str, float]], concurrency: int,
+                 duration: float, rate: Optional[float] = None, seed: Optional[int] = None):
+        self.client = client
+        self.mix = mix
+        self.concurrency = concurrency
+        self.duration = duration
+        self.rate = rate
+        self.seed = seed
+        self.checkpoint_ids: List[str] = []
+        self._lock = threading.Lock()
+        self._next_slot = 0
+        self._started = 0.0
+        self._results: Dict[str, EndpointStats] = {}
+
+    def prepare(self):
+        """Список ID для эндпоинта checkpoint"""
+        if any(name == 'checkpoint' for name, _ in self.mix):
+            self.checkpoint_ids = self.client.get_checkpoint_ids()
+            if not self.checkpoint_ids:
+                raise RuntimeError("API не вернул ни одного ID пункта пропуска")
+
+    def next_send_time(self) -> Optional[float]:
+        """Запланированное время следующего запроса (None - тест окончен)"""
+        if self.rate is None:
+            now = time.perf_counter()
+            return now if now < self._started + self.duration else None
+        with self._lock:
+            slot = self._next_slot
+            self._next_slot += 1
+        scheduled = self._started + slot / self.rate
+        return scheduled if scheduled < self._started + self.duration else None
+
+    def worker(self, worker_index: int):
+        rng = random.Random(None if self.seed is None else self.seed + worker_index)
+        names = [name for name, _ in self.mix]
+        weights = [weight for _, weight in self.mix]
+        results = {name: EndpointStats() for name in names}
+        session = self.client.session
+        timeout = self.client.config.timeout
+
+        while True:
+            scheduled = self.next_send_time()
+            if scheduled is None:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            name = rng.choices(names, weights)[0]
+            path = ENDPOINTS[name] or checkpoint_path(rng.choice(self.checkpoint_ids))
+            # Без --rate задержка считается от фактической отправки
+            started = scheduled if self.rate is not None else time.perf_counter()
+            status = None
+            error = None
+            try:
+                response = session.get(self.client.config.url(path), timeout=timeout)
+                response.content  # тело читается целиком, как у реального клиента
+                status = response.status_code
+                if status != 200:
+                    error = f"HTTP {status}"
+            except requests.RequestException as e:
+                error = type(e).__name__
+            results[name].record(time.perf_counter() - started, status, error)
+
+        with self._lock:
+            for name, stats in results.items():
+                self._results.setdefault(name, EndpointStats()).merge(stats)
+
+    def run(self) -> Dict:
+        self.prepare()
+        started_at = datetime.now().isoformat(timespec='seconds')
+        self._started = time.perf_counter()
+        threads = [threading.Thread(target=self.worker, args=(i,), daemon=True)
+                   for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - self._started
+
+        total = EndpointStats()
+        for stats in self._results.values():
+            total.merge(stats)
+
+        return {
+            'started_at': started_at,
+            'base_url': self.client.config.base_url,
+            'config': {
+                'concurrency': self.concurrency,
+                'duration': self.duration,
+                'rate': self.rate,
+                'mix': dict(self.mix),
+            },
+            'elapsed_seconds': round(elapsed, 3),
+            'total': total.to_dict(elapsed),
+            'endpoints': {name: stats.to_dict(elapsed) for name, stats in sorted(self._results.items())},
+        }
+
+
+def print_report(report: Dict):
+    """Текстовый отчет"""
+    config = report['config']
+    rate = f"{config['rate']} rps" if config['rate'] else "без ограничения"
+    print(f"🚀 {report['base_url']}: {config['concurrency']} потоков, "
+          f"{config['duration']} с, частота {rate}")
+    print(f"{'эндпоинт':14} {'запросы':>8} {'rps':>8} {'ошибки':>7} "
+          f"{'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} {'max мс':>8}")
+
+    rows = list(report['endpoints'].items()) + [('ИТОГО', report['total'])]
+    for name, stats in rows:
+        latency = stats['latency_ms']
+        print(f"{name:14} {stats['requests']:>8} {stats['throughput_rps']:>8} {stats['errors']:>7} "
+              f"{latency['p50'] or 0:>8} {latency['p95'] or 0:>8} {latency['p99'] or 0:>8} "
+              f"{latency['max'] or 0:>8}")
+
+    if report['total']['error_breakdown']:
+        print("\n❌ Ошибки:")
+        for error, count in report['total']['error_breakdown'].items():
+            print(f"  {error}: {count}")
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Нагрузочное тестирование Checkpoint API")
+    arg_parser.add_argument('--url', default=API_BASE_URL, help="Адрес API")
+    arg_parser.add_argument('--username', default=API_USERNAME)
+    arg_parser.add_argument('--password', default=API_PASSWORD)
+    arg_parser.add_argument('--concurrency', type=int, default=10, help="Количество потоков")
+    arg_parser.add_argument('--duration', type=float, default=30, help="Длительность теста, с")
+    arg_parser.add_argument('--rate', type=float, help="Целевая частота запросов в секунду")
+    arg_parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help=f"Смесь эндпоинтов с весами (по умолчанию {DEFAULT_MIX})")
+    arg_parser.add_argument('--timeout', type=float, default=10, help="Таймаут запроса, с")
+    arg_parser.add_argument('--seed', type=int, help="Зерно генератора для воспроизводимой смеси")
+    arg_parser.add_argument('--json', action='store_true', help="Вывести отчет в JSON")
+    arg_parser.add_argument('--output', help="Сохранить отчет в JSON-файл")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        arg_parser.error(str(e))
+
+    config = ClientConfig(base_url=args.url, username=args.username, password=args.password,
+                          timeout=args.timeout, pool_size=args.concurrency)
+    # Без повторов: каждая ошибка должна попасть в отчет
+    with CheckpointClient(config=config, retries=0) as client:
+        load_test = LoadTest(client, mix, args.concurrency, args.duration, args.rate, args.seed)
+        try:
+            report = load_test.run()
+        except Exception as e:
+            print(f"❌ Не удалось запустить тест: {e}", file=sys.stderr)
+            return 1
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+    return 0 if report['total']['requests'] and not report['total']['errors'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
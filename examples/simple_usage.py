@@ -3,70 +3,50 @@
 Простой пример использования Checkpoint API
 """
 
-import requests
-import json
-from requests.auth import HTTPBasicAuth
+from checkpoint_client import CheckpointAPIError, CheckpointClient
 
 # Конфигурация
 API_BASE_URL = "http://localhost"
 API_USERNAME = "admin"
 API_PASSWORD = "checkpoint2025"  # Измените на ваш пароль
 
+# Одна сессия на все запросы: соединения переиспользуются
+client = CheckpointClient(API_BASE_URL, API_USERNAME, API_PASSWORD)
+
 def get_health_status():
     """Получить статус здоровья системы"""
     try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
-    except Exception as e:
+        return client.health()
+    except CheckpointAPIError as e:
         print(f"Ошибка получения статуса: {e}")
         return None
 
 def get_all_checkpoints():
     """Получить все пункты пропуска"""
     try:
-        auth = HTTPBasicAuth(API_USERNAME, API_PASSWORD)
-        response = requests.get(f"{API_BASE_URL}/api/v1/checkpoints", auth=auth, timeout=10)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Ошибка получения данных: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Ошибка: {e}")
+        return client.list_checkpoints()
+    except CheckpointAPIError as e:
+        print(f"Ошибка получения данных: {e}")
         return None
 
 def get_checkpoint_by_id(checkpoint_id):
     """Получить данные конкретного пункта пропуска"""
     try:
-        auth = HTTPBasicAuth(API_USERNAME, API_PASSWORD)
-        response = requests.get(f"{API_BASE_URL}/api/v1/checkpoints/{checkpoint_id}", auth=auth, timeout=10)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Ошибка получения данных для ID {checkpoint_id}: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Ошибка: {e}")
+        return client.get_checkpoint(checkpoint_id)
+    except CheckpointAPIError as e:
+        print(f"Ошибка получения данных для ID {checkpoint_id}: {e}")
         return None
 
+def get_checkpoints_by_ids(checkpoint_ids):
+    """Получить данные нескольких пунктов пропуска параллельно"""
+    return client.get_checkpoints(checkpoint_ids)
+
 def get_statistics():
     """Получить статистику"""
     try:
-        auth = HTTPBasicAuth(API_USERNAME, API_PASSWORD)
-        response = requests.get(f"{API_BASE_URL}/api/v1/stats", auth=auth, timeout=10)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Ошибка получения статистики: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Ошибка: {e}")
+        return client.get_stats()
+    except CheckpointAPIError as e:
+        print(f"Ошибка получения статистики: {e}")
         return None
 
 def main():
@@ -114,6 +94,13 @@ def main():
                     if 'stats' in detailed_data:
                         stats = detailed_data['stats']
                         print(f"  Статистика: {stats}")
+
+                # Несколько пунктов пропуска одним параллельным запросом
+                ids = [checkpoint.get('id') for checkpoint in checkpoints[:3]]
+                print(f"\n⚡ Параллельная загрузка {len(ids)} пунктов пропуска...")
+                for checkpoint_id, data in get_checkpoints_by_ids(ids).items():
+                    status = data.get('status', 'N/A') if data else 'недоступен'
+                    print(f"  {checkpoint_id}: {status}")
         else:
             print("⚠️  Нет данных о пунктах пропуска")
     else:
@@ -145,8 +132,7 @@ def main():
         print("❌ Не удалось получить статистику")
 
 if __name__ == "__main__":
-    main()
-
-
-
-
+    try:
+        main()
+    finally:
+        client.close()
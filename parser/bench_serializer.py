@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк сериализаторов на полном цикле обновления.
+
+Цикл повторяет горячий путь парсера: кодирование каждого дня при
+save_checkpoint_data и декодирование каждого поля при get_checkpoint_data
+для всех пунктов пропуска из links.txt.
+
+Пример:
+    python bench_serializer.py --checkpoints 48 --days 60 --rounds 20
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List
+
+from serializer import SERIALIZERS, get_serializer, orjson
+
+
+def build_cycle_data(checkpoints: int, days: int) -> List[List[Dict]]:
+    """Синтетические данные загруженности в формате load_data"""
+    rng = random.Random(42)
+    cycle = []
+    for _ in range(checkpoints):
+        load_data = []
+        for i in range(days):
+            is_holiday = i % 7 == 6
+            load_data.append({
+                'index': i,
+                'date_text': f"{i % 28 + 1} декабря",
+                'is_holiday': is_holiday,
+                'available_1mrp': 0 if is_holiday else rng.randint(0, 50),
+                'available_100mrp': 0 if is_holiday else rng.randint(0, 10),
+                'load_level': rng.randint(0, 4)
+            })
+        cycle.append(load_data)
+    return cycle
+
+
+def bench_serializer(name: str, cycle: List[List[Dict]], rounds: int) -> Dict:
+    """Замер кодирования и декодирования полного цикла"""
+    serializer = get_serializer(name)
+
+    encode_time = 0.0
+    decode_time = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        encoded = [[serializer.dumps(day) for day in load_data] for load_data in cycle]
+        encode_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for values in encoded:
+            for value in values:
+                serializer.loads(value)
+        decode_time += time.perf_counter() - start
+
+    return {
+        'serializer': name,
+        'encode_ms': round(encode_time / rounds * 1000, 3),
+        'decode_ms': round(decode_time / rounds * 1000, 3),
+        'total_ms': round((encode_time + decode_time) / rounds * 1000, 3)
+    }
+
+
+def run_benchmark(checkpoints: int = 48, days: int = 60, rounds: int = 20) -> List[Dict]:
+    """Бенчмарк всех доступных сериализаторов"""
+    cycle = build_cycle_data(checkpoints, days)
+    names = [name for name in SERIALIZERS if name != 'orjson' or orjson is not None]
+    return [bench_serializer(name, cycle, rounds) for name in names]
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк сериализаторов load_data")
+    arg_parser.add_argument('--checkpoints', type=int, default=48, help="Количество пунктов пропуска")
+    arg_parser.add_argument('--days', type=int, default=60, help="Дней на пункт пропуска")
+    arg_parser.add_argument('--rounds', type=int, default=20, help="Количество повторов цикла")
+    args = arg_parser.parse_args()
+
+    results = run_benchmark(args.checkpoints, args.days, args.rounds)
+    baseline = next(r for r in results if r['serializer'] == 'json')
+
+    print(f"📊 Полный цикл: {args.checkpoints} пунктов x {args.days} дней, {args.rounds} повторов")
+    for result in results:
+        speedup = baseline['total_ms'] / result['total_ms'] if result['total_ms'] else 0
+        print(f"- {result['serializer']:8} encode {result['encode_ms']:8.2f} ms"
+              f"  decode {result['decode_ms']:8.2f} ms"
+              f"  total {result['total_ms']:8.2f} ms  (x{speedup:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
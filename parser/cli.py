@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Командная строка парсера пунктов пропуска.
+
+Команды:
+    run-once  - один цикл обновления (для cron / Kubernetes Job)
+    daemon    - обновление каждые 7 минут (прежнее поведение)
+    replay    - повторный парсинг страниц из архива HTML
+    bench     - бенчмарк сериализаторов
+    summary   - сводная статистика из KeyDB (заодно проверка доступности)
+    profile   - память KeyDB по семействам ключей и прогноз роста
+
+Тяжелые зависимости (requests, bs4, redis, schedule) импортируются
+только командами, которым они нужны. Время запуска до начала работы
+команды пишется в лог (startup_ms).
+"""
+
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+
+from logging_setup import setup_logging
+
+logger = logging.getLogger('checkpoint_parser.cli')
+
+
+def keydb_settings(args) -> dict:
+    """Настройки KeyDB из аргументов и переменных окружения"""
+    return {
+        'keydb_host': args.keydb_host or os.getenv('KEYDB_HOST', 'localhost'),
+        'keydb_port': args.keydb_port or int(os.getenv('KEYDB_PORT', '6379')),
+        'keydb_password': os.getenv('KEYDB_PASSWORD', None)
+    }
+
+
+def report_startup(command: str):
+    """Запись времени запуска команды"""
+    startup_ms = round((time.perf_counter() - _STARTED) * 1000, 1)
+    logger.info("Команда запущена", extra={'command': command, 'startup_ms': startup_ms})
+
+
+def cmd_run_once(args) -> int:
+    from new_checkpoint_data import update_all_checkpoints
+
+    report_startup('run-once')
+    result = update_all_checkpoints(**keydb_settings(args))
+    if not result['total'] or result['failed'] == result['total']:
+        return 1
+    return 0
+
+
+def cmd_daemon(args) -> int:
+    import new_checkpoint_data
+
+    report_startup('daemon')
+    settings = keydb_settings(args)
+    try:
+        new_checkpoint_data.run_scheduler(**settings)
+    except KeyboardInterrupt:
+        logger.info("Остановка парсера")
+    return 0
+
+
+def cmd_replay(args) -> int:
+    from html_archive import HtmlArchive
+    from new_checkpoint_data import CheckpointWebParser, KeyDBManager
+    from serializer import default_serializer
+
+    report_startup('replay')
+    archive_dir = args.archive_dir or os.getenv('PARSER_HTML_ARCHIVE_DIR', '')
+    if not archive_dir or not os.path.isdir(archive_dir):
+        logger.error("Архив HTML не найден", extra={'archive_dir': archive_dir})
+        return 1
+
+    archive = HtmlArchive(archive_dir)
+    parser = CheckpointWebParser()
+    keydb_manager = None
+    if args.save:
+        settings = keydb_settings(args)
+        keydb_manager = KeyDBManager(host=settings['keydb_host'], port=settings['keydb_port'],
+                                     password=settings['keydb_password'])
+    since = datetime.fromisoformat(args.since) if args.since else None
+
+    replayed = 0
+    saved_count = 0
+    for entry, html_content in archive.iter_pages(args.checkpoint_id, since=since):
+        url = f"https://cgr.qoldau.kz/ru/registry/checkpoint/list/{entry['checkpoint_id']}/view"
+        fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        snapshot = parser.parse_snapshot(html_content, url, reference_date=fetched_at.date())
+        record = {
+            'checkpoint_id': entry['checkpoint_id'],
+            'fetched_at': entry['fetched_at'],
+            'sha256': entry['sha256'],
+            'statistics': snapshot.statistics.to_dict()
+        }
+        if keydb_manager is not None:
+            # Пишутся только страницы новее данных в KeyDB, без влияния на скользящую статистику
+            record['saved'] = keydb_manager.save_checkpoint_data(snapshot, fetched_at=fetched_at)
+            saved_count += record['saved']
+        print(default_serializer.dumps(record))
+        replayed += 1
+
+    logger.info("Повторный парсинг завершен", extra={'pages': replayed, 'saved': saved_count})
+    return 0
+
+
+def cmd_bench(args) -> int:
+    from bench_serializer import run_benchmark
+    from serializer import default_serializer
+
+    report_startup('bench')
+    for result in run_benchmark(args.checkpoints, args.days, args.rounds):
+        print(default_serializer.dumps(result))
+    return 0
+
+
+def cmd_summary(args) -> int:
+    from new_checkpoint_data import KeyDBManager
+    from serializer import default_serializer
+
+    report_startup('summary')
+    settings = keydb_settings(args)
+    keydb_manager = KeyDBManager(host=settings['keydb_host'], port=settings['keydb_port'],
+                                 password=settings['keydb_password'])
+    if not keydb_manager.is_connected():
+        return 1
+
+    print(default_serializer.dumps(keydb_manager.get_summary_stats()))
+    return 0
+
+
+def cmd_profile(args) -> int:
+    from keydb_profile import run_profile
+    from new_checkpoint_data import KeyDBManager
+    from serializer import default_serializer
+
+    report_startup('profile')
+    settings = keydb_settings(args)
+    keydb_manager = KeyDBManager(host=settings['keydb_host'], port=settings['keydb_port'],
+                                 password=settings['keydb_password'])
+    if not keydb_manager.is_connected():
+        return 1
+
+    print(default_serializer.dumps(run_profile(keydb_manager.redis_client, target=args.target)))
+    return 0
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(description="Парсер пунктов пропуска CGR с KeyDB")
+    arg_parser.add_argument('--keydb-host', help="Хост KeyDB (по умолчанию KEYDB_HOST)")
+    arg_parser.add_argument('--keydb-port', type=int, help="Порт KeyDB (по умолчанию KEYDB_PORT)")
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    run_once = subparsers.add_parser('run-once', help="Один цикл обновления")
+    run_once.set_defaults(handler=cmd_run_once)
+
+    daemon = subparsers.add_parser('daemon', help="Обновление каждые 7 минут")
+    daemon.set_defaults(handler=cmd_daemon)
+
+    replay = subparsers.add_parser('replay', help="Повторный парсинг страниц из архива HTML")
+    replay.add_argument('--archive-dir', help="Каталог архива (по умолчанию PARSER_HTML_ARCHIVE_DIR)")
+    replay.add_argument('--checkpoint-id', help="Только указанный пункт пропуска")
+    replay.add_argument('--since', help="Только страницы не старше даты (ISO)")
+    replay.add_argument('--save', action='store_true', help="Сохранять в KeyDB страницы новее сохраненных данных")
+    replay.set_defaults(handler=cmd_replay)
+
+    bench = subparsers.add_parser('bench', help="Бенчмарк сериализаторов")
+    bench.add_argument('--checkpoints', type=int, default=48, help="Количество пунктов пропуска")
+    bench.add_argument('--days', type=int, default=60, help="Дней на пункт пропуска")
+    bench.add_argument('--rounds', type=int, default=20, help="Количество повторов цикла")
+    bench.set_defaults(handler=cmd_bench)
+
+    summary = subparsers.add_parser('summary', help="Сводная статистика из KeyDB")
+    summary.set_defaults(handler=cmd_summary)
+
+    profile = subparsers.add_parser('profile', help="Память KeyDB по семействам ключей")
+    profile.add_argument('--target', type=int, default=500, help="Количество пунктов для прогноза")
+    profile.set_defaults(handler=cmd_profile)
+
+    return arg_parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+
+    # Команды с выводом результата пишут логи в stderr, чтобы не смешивать их с данными
+    if args.command in ('replay', 'bench', 'summary', 'profile'):
+        setup_logging(stream=sys.stderr)
+    else:
+        setup_logging()
+
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
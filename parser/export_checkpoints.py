@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Потоковая выгрузка данных пунктов пропуска из KeyDB в CSV / Parquet / Arrow.
+
+Одна строка на пару "пункт пропуска - день". Данные читаются из KeyDB
+пачками через pipeline и сразу пишутся в файл, поэтому потребление
+памяти не зависит от количества пунктов пропуска.
+
+Для форматов parquet и arrow нужен pyarrow (pip install pyarrow).
+
+Примеры:
+    python export_checkpoints.py --format csv --output checkpoints.csv
+    python export_checkpoints.py --format parquet --output checkpoints.parquet
+"""
+
+import argparse
+import csv
+import os
+import sys
+from typing import Dict, Iterator, List
+
+from new_checkpoint_data import KeyDBManager
+
+# Фиксированная схема выгрузки: (колонка, тип pyarrow)
+EXPORT_COLUMNS = [
+    ('checkpoint_id', 'string'),
+    ('name_ru', 'string'),
+    ('border_country', 'string'),
+    ('status', 'string'),
+    ('day_index', 'int32'),
+    ('date_text', 'string'),
+    ('date', 'string'),
+    ('is_holiday', 'bool_'),
+    ('available_1mrp', 'int32'),
+    ('available_100mrp', 'int32'),
+    ('load_level', 'int32'),
+    ('last_updated', 'string'),
+]
+
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow')
+
+
+def iter_export_rows(checkpoints: Iterator[Dict]) -> Iterator[Dict]:
+    """Разворачивание пунктов пропуска в строки по дням"""
+    for checkpoint in checkpoints:
+        basic_info = checkpoint.get('basic_info', {})
+        meta = checkpoint.get('metadata', {})
+        for day in checkpoint.get('load_data', []):
+            yield {
+                'checkpoint_id': checkpoint['checkpoint_id'],
+                'name_ru': basic_info.get('name_ru'),
+                'border_country': basic_info.get('border_country'),
+                'status': basic_info.get('status'),
+                'day_index': day.get('index'),
+                'date_text': day.get('date_text'),
+                'date': day.get('date'),
+                'is_holiday': day.get('is_holiday'),
+                'available_1mrp': day.get('available_1mrp'),
+                'available_100mrp': day.get('available_100mrp'),
+                'load_level': day.get('load_level'),
+                'last_updated': meta.get('last_updated'),
+            }
+
+
+def export_csv(rows: Iterator[Dict], output: str) -> int:
+    """Запись строк в CSV"""
+    count = 0
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=[name for name, _ in EXPORT_COLUMNS])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def export_arrow(rows: Iterator[Dict], output: str, file_format: str, batch_rows: int = 10000) -> int:
+    """Запись строк в Parquet или Arrow IPC пачками фиксированного размера"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Для форматов parquet/arrow установите pyarrow: pip install pyarrow")
+
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in EXPORT_COLUMNS])
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(output, schema)
+    else:
+        writer = pa.ipc.new_file(output, schema)
+
+    count = 0
+    columns: Dict[str, List] = {name: [] for name, _ in EXPORT_COLUMNS}
+
+    def flush():
+        batch = pa.record_batch([columns[name] for name, _ in EXPORT_COLUMNS], schema=schema)
+        if file_format == 'parquet':
+            writer.write_batch(batch)
+        else:
+            writer.write(batch)
+        for values in columns.values():
+            values.clear()
+
+    try:
+        for row in rows:
+            for name, _ in EXPORT_COLUMNS:
+                columns[name].append(row[name])
+            count += 1
+            if count % batch_rows == 0:
+                flush()
+        if count % batch_rows:
+            flush()
+    finally:
+        writer.close()
+
+    return count
+
+
+def export_checkpoints(keydb_manager: KeyDBManager, output: str, file_format: str = 'csv',
+                       batch_size: int = 100) -> int:
+    """Выгрузка всех пунктов пропуска, возвращает количество строк"""
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат: {file_format}")
+
+    # Пишем во временный файл, чтобы читатели не увидели недописанную выгрузку
+    tmp_output = f"{output}.tmp"
+    rows = iter_export_rows(keydb_manager.iter_checkpoints(batch_size=batch_size))
+    try:
+        if file_format == 'csv':
+            count = export_csv(rows, tmp_output)
+        else:
+            count = export_arrow(rows, tmp_output, file_format)
+        os.replace(tmp_output, output)
+    except Exception:
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+        raise
+
+    return count
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="Выгрузка данных пунктов пропуска из KeyDB")
+    arg_parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help="Формат файла")
+    arg_parser.add_argument('--output', required=True, help="Путь к файлу выгрузки")
+    arg_parser.add_argument('--batch-size', type=int, default=100, help="Пунктов пропуска на один pipeline")
+    args = arg_parser.parse_args()
+
+    keydb_manager = KeyDBManager(
+        host=os.getenv('KEYDB_HOST', 'localhost'),
+        port=int(os.getenv('KEYDB_PORT', '6379')),
+        password=os.getenv('KEYDB_PASSWORD', None)
+    )
+    if not keydb_manager.is_connected():
+        print("❌ Не удалось подключиться к KeyDB!")
+        return 1
+
+    try:
+        count = export_checkpoints(keydb_manager, args.output, args.format, args.batch_size)
+    except Exception as e:
+        print(f"❌ Ошибка выгрузки: {e}")
+        return 1
+
+    print(f"✅ Выгружено строк: {count} -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
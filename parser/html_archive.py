@@ -0,0 +1,230 @@
+"""
+Архив HTML-страниц пунктов пропуска для отладки и повторного парсинга.
+
+Страницы хранятся сжатыми и адресуются по SHA-256 содержимого, поэтому
+одинаковые страницы из соседних циклов занимают только запись в индексе.
+Индекс ведется по каждому пункту пропуска в виде JSON Lines:
+
+    <root>/blobs/ab/<sha256>.html.gz
+    <root>/index/<checkpoint_id>.jsonl
+
+Для сжатия используется gzip, либо zstd, если установлен zstandard.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from serializer import default_serializer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger('checkpoint_parser.html_archive')
+
+CODEC_EXTENSIONS = {
+    'gzip': '.html.gz',
+    'zstd': '.html.zst',
+}
+
+
+class HtmlArchive:
+    """Дедуплицирующий сжатый архив HTML-страниц"""
+
+    def __init__(self, root: str, retention_days: float = 7, codec: str = 'gzip',
+                 prune_interval: float = 3600):
+        if codec == 'zstd' and zstandard is None:
+            logger.warning("zstandard не установлен, используется gzip")
+            codec = 'gzip'
+        if codec not in CODEC_EXTENSIONS:
+            raise ValueError(f"Неизвестный кодек: {codec}")
+
+        self.root = root
+        self.retention = timedelta(days=retention_days)
+        self.codec = codec
+        self.prune_interval = prune_interval
+        self.prune_marker = os.path.join(root, '.pruned')
+        self.blobs_dir = os.path.join(root, 'blobs')
+        self.index_dir = os.path.join(root, 'index')
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['HtmlArchive']:
+        """Архив из переменных окружения (None, если архив отключен)"""
+        root = os.getenv('PARSER_HTML_ARCHIVE_DIR', '')
+        if not root:
+            return None
+        return cls(
+            root=root,
+            retention_days=float(os.getenv('PARSER_HTML_ARCHIVE_RETENTION_DAYS', '7')),
+            codec=os.getenv('PARSER_HTML_ARCHIVE_CODEC', 'gzip'),
+            prune_interval=float(os.getenv('PARSER_HTML_ARCHIVE_PRUNE_SECONDS', '3600')),
+        )
+
+    def blob_path(self, content_hash: str, codec: str) -> str:
+        """Путь к сжатой странице"""
+        return os.path.join(self.blobs_dir, content_hash[:2], content_hash + CODEC_EXTENSIONS[codec])
+
+    def index_path(self, checkpoint_id: str) -> str:
+        """Путь к индексу пункта пропуска"""
+        return os.path.join(self.index_dir, f"{checkpoint_id}.jsonl")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def decompress(self, data: bytes, codec: str) -> bytes:
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("Для чтения zstd-страниц установите zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def store(self, checkpoint_id: str, html_content: str, fetched_at: Optional[datetime] = None) -> str:
+        """Сохранение страницы в архив, возвращает хэш содержимого"""
+        raw = html_content.encode('utf-8')
+        content_hash = hashlib.sha256(raw).hexdigest()
+
+        # Одинаковая страница уже могла быть сохранена любым кодеком
+        stored_codec = None
+        for codec in CODEC_EXTENSIONS:
+            if os.path.exists(self.blob_path(content_hash, codec)):
+                stored_codec = codec
+                break
+
+        if stored_codec is None:
+            stored_codec = self.codec
+            path = self.blob_path(content_hash, stored_codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(self.compress(raw))
+            os.replace(tmp_path, path)
+
+        entry = {
+            'fetched_at': (fetched_at or datetime.now()).isoformat(),
+            'sha256': content_hash,
+            'codec': stored_codec,
+            'size': len(raw)
+        }
+        with open(self.index_path(checkpoint_id), 'a', encoding='utf-8') as f:
+            f.write(default_serializer.dumps(entry) + '\n')
+
+        return content_hash
+
+    def iter_entries(self, checkpoint_id: Optional[str] = None, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Iterator[Dict]:
+        """Записи индекса по пункту пропуска (или всем) в интервале времени"""
+        if checkpoint_id is None:
+            checkpoint_ids = sorted(name[:-len('.jsonl')] for name in os.listdir(self.index_dir)
+                                    if name.endswith('.jsonl'))
+        else:
+            checkpoint_ids = [checkpoint_id]
+
+        since_text = since.isoformat() if since else None
+        until_text = until.isoformat() if until else None
+
+        for current_id in checkpoint_ids:
+            path = self.index_path(current_id)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = default_serializer.loads(line)
+                    if since_text and entry['fetched_at'] < since_text:
+                        continue
+                    if until_text and entry['fetched_at'] > until_text:
+                        continue
+                    entry['checkpoint_id'] = current_id
+                    yield entry
+
+    def load(self, entry: Dict) -> str:
+        """Чтение страницы по записи индекса"""
+        with open(self.blob_path(entry['sha256'], entry['codec']), 'rb') as f:
+            return self.decompress(f.read(), entry['codec']).decode('utf-8')
+
+    def iter_pages(self, checkpoint_id: Optional[str] = None, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None) -> Iterator[Tuple[Dict, str]]:
+        """Потоковое чтение страниц для повторного парсинга"""
+        for entry in self.iter_entries(checkpoint_id, since, until):
+            try:
+                yield entry, self.load(entry)
+            except FileNotFoundError:
+                logger.warning("Страница отсутствует в архиве", extra={'sha256': entry['sha256']})
+
+    def prune_due(self, now: datetime) -> bool:
+        """Прошло ли prune_interval секунд с прошлой очистки (отметка - mtime файла .pruned)"""
+        try:
+            return now.timestamp() - os.path.getmtime(self.prune_marker) >= self.prune_interval
+        except FileNotFoundError:
+            return True
+
+    def prune(self, now: Optional[datetime] = None, force: bool = False) -> Optional[Dict]:
+        """
+        Удаление записей старше срока хранения и неиспользуемых страниц.
+
+        Выполняется не чаще раза в prune_interval секунд (None - очистка
+        пропущена). Перезаписываются только индексы с устаревшими записями,
+        каталог страниц обходится, только если записи были удалены.
+        """
+        now = now or datetime.now()
+        if not force and not self.prune_due(now):
+            return None
+
+        cutoff = (now - self.retention).isoformat()
+        live_hashes = set()
+        removed_entries = 0
+
+        for name in os.listdir(self.index_dir):
+            if not name.endswith('.jsonl'):
+                continue
+            path = os.path.join(self.index_dir, name)
+            kept_lines = []
+            file_removed = 0
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = default_serializer.loads(line)
+                    if entry['fetched_at'] < cutoff:
+                        file_removed += 1
+                        continue
+                    live_hashes.add(entry['sha256'])
+                    kept_lines.append(line)
+
+            if not file_removed:
+                continue
+            removed_entries += file_removed
+            if kept_lines:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.writelines(kept_lines)
+                os.replace(tmp_path, path)
+            else:
+                os.remove(path)
+
+        with open(self.prune_marker, 'w', encoding='utf-8') as f:
+            f.write(now.isoformat())
+        os.utime(self.prune_marker, (now.timestamp(), now.timestamp()))
+
+        if not removed_entries:
+            return {'removed_entries': 0, 'removed_blobs': 0}
+
+        removed_blobs = 0
+        for dirpath, _, filenames in os.walk(self.blobs_dir):
+            for filename in filenames:
+                content_hash = filename.split('.', 1)[0]
+                if content_hash not in live_hashes:
+                    os.remove(os.path.join(dirpath, filename))
+                    removed_blobs += 1
+
+        return {'removed_entries': removed_entries, 'removed_blobs': removed_blobs}
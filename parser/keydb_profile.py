@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Профилирование памяти KeyDB по семействам ключей.
+
+Обходит пространство ключей checkpoint:* (и индексы checkpoints:*)
+через SCAN без блокировки сервера и для каждого ключа собирает
+MEMORY USAGE, OBJECT ENCODING и количество полей/элементов.
+Ключи группируются по семействам (info, stats, load_data, meta, fetch,
+index:country, index:rank, ...). По средней стоимости одного пункта
+пропуска строится прогноз памяти для заданного количества пунктов.
+
+Пример:
+    python keydb_profile.py --target 500
+    python keydb_profile.py --json
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+CHECKPOINT_PATTERN = 'checkpoint:*'
+INDEX_PATTERN = 'checkpoints:*'
+
+# Команда подсчета полей/элементов по типу ключа
+SIZE_COMMANDS = {
+    'hash': 'hlen',
+    'set': 'scard',
+    'zset': 'zcard',
+    'list': 'llen',
+    'string': 'strlen',
+}
+
+# Пороги компактной кодировки хэшей и множеств
+ENCODING_SETTINGS = (
+    'hash-max-listpack-entries', 'hash-max-listpack-value',
+    'hash-max-ziplist-entries', 'hash-max-ziplist-value',
+    'zset-max-listpack-entries', 'zset-max-ziplist-entries',
+    'set-max-intset-entries',
+)
+
+
+def key_family(key: str) -> str:
+    """Семейство ключа: checkpoint:{id}:info -> info, checkpoints:rank:x -> index:rank"""
+    parts = key.split(':')
+    if parts[0] == 'checkpoint' and len(parts) >= 3:
+        return parts[-1]
+    if parts[0] == 'checkpoints' and len(parts) >= 2:
+        return f"index:{parts[1]}"
+    return parts[0]
+
+
+class FamilyStats:
+    """Накопленная статистика по семейству ключей"""
+
+    def __init__(self):
+        self.keys = 0
+        self.bytes = 0
+        self.max_bytes = 0
+        self.fields = 0
+        self.max_fields = 0
+        self.unmeasured = 0
+        self.types: Counter = Counter()
+        self.encodings: Counter = Counter()
+
+    def add(self, key_type: str, memory: Optional[int], encoding: Optional[str], size: Optional[int]):
+        self.keys += 1
+        self.types[key_type] += 1
+        if encoding:
+            self.encodings[encoding] += 1
+        if memory is None:
+            self.unmeasured += 1
+        else:
+            self.bytes += memory
+            self.max_bytes = max(self.max_bytes, memory)
+        if size is not None:
+            self.fields += size
+            self.max_fields = max(self.max_fields, size)
+
+    def to_dict(self) -> Dict:
+        measured = self.keys - self.unmeasured
+        return {
+            'keys': self.keys,
+            'bytes': self.bytes,
+            'avg_bytes': round(self.bytes / measured, 1) if measured else None,
+            'max_bytes': self.max_bytes,
+            'fields': self.fields,
+            'avg_fields': round(self.fields / self.keys, 1) if self.keys else 0,
+            'max_fields': self.max_fields,
+            'types': dict(self.types),
+            'encodings': dict(self.encodings),
+            'unmeasured': self.unmeasured
+        }
+
+
+def value_or_none(value):
+    """Результат команды конвейера (исключение -> None)"""
+    return None if isinstance(value, Exception) else value
+
+
+def profile_batch(client, keys: List[str], families: Dict[str, FamilyStats], samples: int):
+    """Замер пачки ключей двумя конвейерами"""
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.type(key)
+        pipe.execute_command('MEMORY', 'USAGE', key, 'SAMPLES', samples)
+        pipe.execute_command('OBJECT', 'ENCODING', key)
+    results = pipe.execute(raise_on_error=False)
+
+    pipe = client.pipeline(transaction=False)
+    key_types = []
+    for i, key in enumerate(keys):
+        key_type = value_or_none(results[i * 3]) or 'none'
+        key_types.append(key_type)
+        pipe.execute_command(SIZE_COMMANDS.get(key_type, 'exists'), key)
+    sizes = pipe.execute(raise_on_error=False)
+
+    for i, key in enumerate(keys):
+        if key_types[i] == 'none':
+            # Ключ удален или истек между SCAN и замером
+            continue
+        families.setdefault(key_family(key), FamilyStats()).add(
+            key_types[i],
+            value_or_none(results[i * 3 + 1]),
+            value_or_none(results[i * 3 + 2]),
+            value_or_none(sizes[i]),
+        )
+
+
+def scan_families(client, patterns: Iterable[str], scan_count: int = 500,
+                  samples: int = 0) -> Dict[str, FamilyStats]:
+    """Обход ключей по шаблонам через SCAN с замером пачками"""
+    families: Dict[str, FamilyStats] = {}
+    for pattern in patterns:
+        batch = []
+        for key in client.scan_iter(match=pattern, count=scan_count):
+            batch.append(key)
+            if len(batch) >= scan_count:
+                profile_batch(client, batch, families, samples)
+                batch = []
+        if batch:
+            profile_batch(client, batch, families, samples)
+    return families
+
+
+def read_server_memory(client) -> Dict:
+    """Память сервера и пороги кодировок (если команды доступны)"""
+    server = {}
+    try:
+        info = client.info('memory')
+        for field in ('used_memory', 'used_memory_startup', 'used_memory_dataset',
+                      'mem_fragmentation_ratio', 'maxmemory'):
+            if field in info:
+                server[field] = info[field]
+    except Exception:
+        pass
+
+    settings = {}
+    try:
+        for name in ENCODING_SETTINGS:
+            settings.update(client.config_get(name))
+    except Exception:
+        pass
+    if settings:
+        server['encoding_settings'] = {name: int(value) for name, value in settings.items()}
+    return server
+
+
+def count_checkpoints(client) -> int:
+    """Количество пунктов пропуска в checkpoints:all"""
+    try:
+        return int(client.scard('checkpoints:all'))
+    except Exception:
+        return 0
+
+
+def project_memory(families: Dict[str, FamilyStats], checkpoints: int, server: Dict,
+                   target: int, maxmemory_mb: Optional[float]) -> Dict:
+    """Прогноз памяти для target пунктов пропуска"""
+    checkpoint_bytes = sum(stats.bytes for name, stats in families.items()
+                           if not name.startswith('index:'))
+    # Индексы растут вместе с количеством пунктов (элементы множеств и zset)
+    index_bytes = sum(stats.bytes for name, stats in families.items() if name.startswith('index:'))
+
+    per_checkpoint = checkpoint_bytes / checkpoints if checkpoints else 0
+    index_per_checkpoint = index_bytes / checkpoints if checkpoints else 0
+    baseline = int(server.get('used_memory_startup', 0))
+    projected = baseline + target * (per_checkpoint + index_per_checkpoint)
+
+    limit_bytes = server.get('maxmemory') or 0
+    if not limit_bytes and maxmemory_mb:
+        limit_bytes = int(maxmemory_mb * 1024 * 1024)
+
+    projection = {
+        'checkpoints': checkpoints,
+        'target_checkpoints': target,
+        'bytes_per_checkpoint': round(per_checkpoint, 1),
+        'index_bytes_per_checkpoint': round(index_per_checkpoint, 1),
+        'baseline_bytes': baseline,
+        'projected_bytes': int(projected),
+        'projected_mb': round(projected / 1024 / 1024, 2),
+    }
+    fragmentation = server.get('mem_fragmentation_ratio')
+    if fragmentation:
+        projection['projected_rss_mb'] = round(projected * float(fragmentation) / 1024 / 1024, 2)
+    if limit_bytes:
+        projection['maxmemory_mb'] = round(limit_bytes / 1024 / 1024, 1)
+        projection['maxmemory_ratio'] = round(projected / limit_bytes, 3)
+        if per_checkpoint + index_per_checkpoint:
+            projection['max_checkpoints'] = int((limit_bytes - baseline) / (per_checkpoint + index_per_checkpoint))
+    return projection
+
+
+def run_profile(client, target: int = 500, samples: int = 0, scan_count: int = 500,
+                maxmemory_mb: Optional[float] = None) -> Dict:
+    """Полный отчет: семейства ключей, память сервера, прогноз"""
+    families = scan_families(client, (CHECKPOINT_PATTERN, INDEX_PATTERN), scan_count, samples)
+    checkpoints = count_checkpoints(client)
+    if not checkpoints:
+        checkpoints = max((stats.keys for name, stats in families.items() if name == 'info'), default=0)
+    server = read_server_memory(client)
+
+    return {
+        'families': {name: families[name].to_dict() for name in sorted(families)},
+        'server': server,
+        'projection': project_memory(families, checkpoints, server, target, maxmemory_mb),
+    }
+
+
+def print_report(report: Dict):
+    """Текстовый отчет"""
+    print(f"{'семейство':16} {'ключи':>7} {'байт всего':>12} {'байт/ключ':>10} "
+          f"{'полей/ключ':>10} {'макс. полей':>11}  кодировки")
+    for name, stats in report['families'].items():
+        encodings = ', '.join(f"{encoding}={count}" for encoding, count in stats['encodings'].items())
+        print(f"{name:16} {stats['keys']:>7} {stats['bytes']:>12} {stats['avg_bytes'] or 0:>10} "
+              f"{stats['avg_fields']:>10} {stats['max_fields']:>11}  {encodings or '-'}")
+        if stats['unmeasured']:
+            print(f"{'':16} MEMORY USAGE недоступна для {stats['unmeasured']} ключей")
+
+    server = report['server']
+    if 'used_memory' in server:
+        print(f"\n🧠 used_memory: {server['used_memory'] / 1024 / 1024:.2f} MB, "
+              f"startup: {server.get('used_memory_startup', 0) / 1024 / 1024:.2f} MB, "
+              f"фрагментация: {server.get('mem_fragmentation_ratio', '-')}")
+    if server.get('encoding_settings'):
+        print("⚙️  " + ', '.join(f"{name}={value}" for name, value in server['encoding_settings'].items()))
+
+    projection = report['projection']
+    print(f"\n📈 Пунктов пропуска: {projection['checkpoints']}, "
+          f"на пункт: {projection['bytes_per_checkpoint']} B + индексы {projection['index_bytes_per_checkpoint']} B")
+    print(f"   Прогноз для {projection['target_checkpoints']}: {projection['projected_mb']} MB", end='')
+    if 'projected_rss_mb' in projection:
+        print(f" (RSS ~{projection['projected_rss_mb']} MB)", end='')
+    print()
+    if 'maxmemory_mb' in projection:
+        print(f"   Лимит {projection['maxmemory_mb']} MB: занято {projection['maxmemory_ratio'] * 100:.1f}%"
+              f", вместимость ~{projection.get('max_checkpoints', '-')} пунктов")
+
+
+def main(argv=None) -> int:
+    import redis
+
+    from serializer import default_serializer
+
+    arg_parser = argparse.ArgumentParser(description="Профилирование памяти KeyDB по семействам ключей")
+    arg_parser.add_argument('--host', default=os.getenv('KEYDB_HOST', 'localhost'))
+    arg_parser.add_argument('--port', type=int, default=int(os.getenv('KEYDB_PORT', '6379')))
+    arg_parser.add_argument('--target', type=int, default=500, help="Количество пунктов для прогноза")
+    arg_parser.add_argument('--samples', type=int, default=0,
+                            help="SAMPLES для MEMORY USAGE (0 - все элементы)")
+    arg_parser.add_argument('--scan-count', type=int, default=500, help="COUNT для SCAN и размер пачки")
+    arg_parser.add_argument('--maxmemory-mb', type=float, default=150,
+                            help="Лимит памяти, если maxmemory сервера не задан")
+    arg_parser.add_argument('--json', action='store_true', help="Вывести отчет в JSON")
+    args = arg_parser.parse_args(argv)
+
+    client = redis.Redis(host=args.host, port=args.port, password=os.getenv('KEYDB_PASSWORD', None),
+                         decode_responses=True, socket_connect_timeout=5, socket_timeout=30)
+    try:
+        client.ping()
+    except redis.RedisError as e:
+        print(f"❌ KeyDB недоступен: {e}", file=sys.stderr)
+        return 1
+
+    report = run_profile(client, args.target, args.samples, args.scan_count, args.maxmemory_mb)
+    if args.json:
+        print(default_serializer.dumps(report))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
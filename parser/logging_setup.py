@@ -0,0 +1,84 @@
+"""
+Настройка логирования парсера.
+
+Записи передаются через очередь (QueueHandler) в отдельный поток
+(QueueListener), который пишет их в stdout. Вызов логгера на горячем
+пути только кладет запись в очередь и не ждет консольного ввода-вывода.
+
+Переменные окружения:
+    PARSER_LOG_LEVEL   - уровень логирования (по умолчанию INFO)
+    PARSER_LOG_FORMAT  - json (по умолчанию) или text
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime
+from typing import IO, Optional
+
+from serializer import default_serializer
+
+# Стандартные атрибуты LogRecord, которые не считаются полями записи
+RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирование записи в одну строку JSON с полями из extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key in RESERVED_ATTRS or key.startswith('_'):
+                continue
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                value = str(value)
+            data[key] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return default_serializer.dumps(data)
+
+
+def setup_logging(level: Optional[str] = None, log_format: Optional[str] = None,
+                  stream: Optional[IO[str]] = None):
+    """Настройка асинхронного логирования для процесса парсера"""
+    global _listener
+
+    if _listener is not None:
+        return
+
+    level = (level or os.getenv('PARSER_LOG_LEVEL', 'INFO')).upper()
+    log_format = log_format or os.getenv('PARSER_LOG_FORMAT', 'json')
+
+    stream_handler = logging.StreamHandler(stream or sys.stdout)
+    if log_format == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Остановка потока логирования с выводом оставшихся записей"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,102 @@
+"""
+Контроль бюджета памяти процесса парсера.
+
+Контейнер парсера ограничен 150 MB, поэтому перед каждой загрузкой
+страницы проверяем RSS процесса и, при приближении к лимиту,
+освобождаем память и отказываемся от необязательной работы (архив HTML)
+вместо OOM-kill. Ожидания нет: загрузки идут последовательно, и за время
+паузы память освободить некому.
+"""
+
+import gc
+import logging
+import os
+import tracemalloc
+from typing import Dict, Optional
+
+logger = logging.getLogger('checkpoint_parser.memory')
+
+
+def read_rss_bytes() -> int:
+    """Текущий RSS процесса в байтах"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Не Linux: берем пиковое значение как верхнюю оценку
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryBudget:
+    """Бюджет памяти с учетом RSS и аллокаций tracemalloc"""
+
+    def __init__(self, budget_mb: float = 150, soft_ratio: float = 0.8,
+                 track_allocations: bool = False):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.soft_limit_bytes = int(self.budget_bytes * soft_ratio)
+        self.track_allocations = track_allocations
+        self.pressure_count = 0
+
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls) -> 'MemoryBudget':
+        """Создание бюджета из переменных окружения"""
+        return cls(
+            budget_mb=float(os.getenv('PARSER_MEMORY_BUDGET_MB', '150')),
+            soft_ratio=float(os.getenv('PARSER_MEMORY_SOFT_RATIO', '0.8')),
+            track_allocations=os.getenv('PARSER_TRACEMALLOC', '0') == '1',
+        )
+
+    def usage(self) -> Dict:
+        """Текущее потребление памяти"""
+        usage = {'rss_bytes': read_rss_bytes()}
+        if self.track_allocations and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            usage['traced_bytes'] = current
+            usage['traced_peak_bytes'] = peak
+        return usage
+
+    def is_under_pressure(self, usage: Optional[Dict] = None) -> bool:
+        """Превышен ли мягкий лимит"""
+        usage = usage or self.usage()
+        return usage['rss_bytes'] >= self.soft_limit_bytes
+
+    def release(self):
+        """Принудительное освобождение памяти"""
+        gc.collect()
+        if self.track_allocations and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def check_headroom(self) -> bool:
+        """Проверка свободной памяти перед следующей загрузкой без ожидания.
+
+        Возвращает False, если память выше мягкого лимита и после
+        освобождения: вызывающий код пропускает необязательную работу.
+        Предупреждение пишется один раз за время жизни бюджета (цикл).
+        """
+        if not self.is_under_pressure():
+            return True
+
+        self.release()
+        usage = self.usage()
+        if not self.is_under_pressure(usage):
+            return True
+
+        self.pressure_count += 1
+        if self.pressure_count == 1:
+            logger.warning("Память выше мягкого лимита, архив HTML пропускается",
+                           extra={'usage': self.format_usage(usage)})
+        return False
+
+    def format_usage(self, usage: Optional[Dict] = None) -> str:
+        """Строка с потреблением памяти для логов"""
+        usage = usage or self.usage()
+        text = f"RSS {usage['rss_bytes'] / 1024 / 1024:.1f}/{self.budget_bytes / 1024 / 1024:.0f} MB"
+        if 'traced_bytes' in usage:
+            text += (f", Python {usage['traced_bytes'] / 1024 / 1024:.1f} MB"
+                     f" (пик {usage['traced_peak_bytes'] / 1024 / 1024:.1f} MB)")
+        return text
@@ -1,15 +1,38 @@
-import requests
-from bs4 import BeautifulSoup
 import re
-from datetime import datetime
-import json
+from datetime import date, datetime, timedelta
+import hashlib
 import os
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Union
 import html
 import time
-import redis
-import schedule
 import threading
+import logging
+
+from memory_budget import MemoryBudget
+from records import CheckpointSnapshot, DayLoad
+from rolling_stats import TREND_METRICS, update_trend
+from serializer import default_serializer
+from html_archive import HtmlArchive
+from logging_setup import setup_logging
+from profiling import cycle_profiler
+from snapshot_file import write_snapshot
+
+# requests, bs4, redis и schedule импортируются по месту использования,
+# чтобы короткие команды CLI не платили за их загрузку
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+logger = logging.getLogger('checkpoint_parser')
+
+# Версия формата данных, записываемых парсером. Неизмененные страницы
+# пропускаются только если они были разобраны той же версией парсера.
+PARSER_DATA_VERSION = '5'
+
+# Метрики, по которым ведутся рейтинги пунктов пропуска (sorted sets)
+INDEX_METRICS = ('avg_1mrp', 'avg_100mrp', 'next_available')
+
+# Хэши пункта пропуска checkpoint:{id}:{suffix}: общий TTL и удаление при очистке
+CHECKPOINT_KEY_SUFFIXES = ('info', 'stats', 'load_data', 'meta', 'fetch', 'trend')
 
 def read_links_from_file(filename: str = 'links.txt') -> List[str]:
     """Чтение ссылок из файла"""
@@ -20,28 +43,136 @@ def read_links_from_file(filename: str = 'links.txt') -> List[str]:
                 link = line.strip()
                 if link and link.startswith('http'):
                     links.append(link)
-        print(f"Загружено {len(links)} ссылок из {filename}")
+        logger.info("Ссылки загружены", extra={'links': len(links), 'file': filename})
         return links
     except FileNotFoundError:
-        print(f"Файл {filename} не найден")
+        logger.error("Файл со ссылками не найден", extra={'file': filename})
         return []
     except Exception as e:
-        print(f"Ошибка при чтении файла {filename}: {e}")
+        logger.error("Ошибка при чтении файла со ссылками", extra={'file': filename, 'error': str(e)})
         return []
 
+# Координаты в градусах, минутах и секундах: 43°12'30"N 76°54'10"E
+DMS_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*°\s*(?:(\d+(?:[.,]\d+)?)\s*[′']\s*)?(?:(\d+(?:[.,]\d+)?)\s*(?:″|\"|'')\s*)?([NSEWСЮВЗ])?", re.IGNORECASE)
+# Десятичные координаты: 43.2123, 76.9123 или 43,2123 76,9123
+DECIMAL_PATTERN = re.compile(r"-?\d{1,3}(?:[.,]\d+)?")
+
+def parse_coordinates(text: str) -> Optional[tuple]:
+    """Разбор строки координат в (широта, долгота)"""
+    if not text:
+        return None
+    
+    values = []
+    dms_matches = list(DMS_PATTERN.finditer(text))
+    if dms_matches and len(dms_matches) < 2:
+        return None
+    if dms_matches:
+        for match in dms_matches[:2]:
+            degrees, minutes, seconds, hemisphere = match.groups()
+            value = float(degrees.replace(',', '.'))
+            value += float((minutes or '0').replace(',', '.')) / 60
+            value += float((seconds or '0').replace(',', '.')) / 3600
+            if hemisphere and hemisphere.upper() in ('S', 'W', 'Ю', 'З'):
+                value = -value
+            values.append(value)
+    else:
+        # Сначала пары с точкой, затем с запятой как десятичным разделителем
+        numbers = re.findall(r"-?\d{1,3}\.\d+", text)
+        if len(numbers) < 2:
+            numbers = DECIMAL_PATTERN.findall(text)
+        if len(numbers) < 2:
+            return None
+        values = [float(number.replace(',', '.')) for number in numbers[:2]]
+    
+    latitude, longitude = values
+    if abs(latitude) > 90 and abs(longitude) <= 90:
+        latitude, longitude = longitude, latitude
+    if abs(latitude) > 90 or abs(longitude) > 180:
+        return None
+    return round(latitude, 6), round(longitude, 6)
+
+# Телефон пункта пропуска: 8-(7172)-12-34-56
+PHONE_PATTERN = re.compile(r'8-\(\d+\)-\d+-\d+-\d+')
+# Поля основной информации (названия, статус, страна, координаты, режим работы):
+# div с классами form-control и bg-light при любом порядке атрибутов и кавычках
+STATIC_FIELD_PATTERN = re.compile(r'<div\b[^>]*?\bclass\s*=\s*(["\'])([^"\']*)\1[^>]*>(.*?)</div>',
+                                  re.DOTALL | re.IGNORECASE)
+STATIC_FIELD_CLASSES = {'form-control', 'bg-light'}
+# Меньше полей, чем три названия, - разметка не распознана, отпечатку не доверяем
+STATIC_FIELD_MIN_COUNT = 3
+
+# Названия месяцев в родительном падеже, как в tooltip: "1 декабря"
+RU_MONTHS = {
+    'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4, 'мая': 5, 'июня': 6,
+    'июля': 7, 'августа': 8, 'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12
+}
+RU_MONTHS_PATTERN = '|'.join(RU_MONTHS)
+# Форматы даты в tooltip, от самого точного: числовой проверяется первым,
+# иначе "01.12.2026" частично совпадает с "день месяц" ("26 за")
+TOOLTIP_DATE_PATTERNS = (
+    re.compile(r'(\d{1,2}\.\d{1,2}\.\d{4})'),                                  # "01.12.2024"
+    re.compile(rf'(\d{{1,2}}\s+(?:{RU_MONTHS_PATTERN})\s+\d{{4}})', re.IGNORECASE),  # "1 декабря 2024"
+    re.compile(rf'(\d{{1,2}}\s+(?:{RU_MONTHS_PATTERN}))', re.IGNORECASE),            # "1 декабря"
+)
+
+def normalize_date_text(date_text: str, reference_date: Optional[date] = None) -> Optional[str]:
+    """Приведение даты из tooltip к ISO (YYYY-MM-DD).
+    
+    Если год не указан, выбирается год, при котором дата ближе всего
+    к reference_date (дате загрузки страницы): график показывает ближайшие
+    дни, поэтому "3 января" в конце декабря относится к следующему году.
+    """
+    if not date_text:
+        return None
+    reference_date = reference_date or date.today()
+    
+    try:
+        match = re.fullmatch(r'(\d{1,2})\.(\d{1,2})\.(\d{4})', date_text.strip())
+        if match:
+            day, month, year = (int(part) for part in match.groups())
+            return date(year, month, day).isoformat()
+        
+        parts = date_text.lower().split()
+        if len(parts) < 2 or parts[1] not in RU_MONTHS:
+            return None
+        day, month = int(parts[0]), RU_MONTHS[parts[1]]
+        if len(parts) >= 3 and parts[2].isdigit():
+            return date(int(parts[2]), month, day).isoformat()
+        
+        candidates = []
+        for year in (reference_date.year - 1, reference_date.year, reference_date.year + 1):
+            try:
+                candidates.append(date(year, month, day))
+            except ValueError:
+                # 29 февраля в невисокосный год
+                pass
+        if not candidates:
+            return None
+        return min(candidates, key=lambda candidate: abs((candidate - reference_date).days)).isoformat()
+    except ValueError:
+        return None
+
 class KeyDBManager:
     """Менеджер для работы с KeyDB"""
     
-    def __init__(self, host='localhost', port=6379, db=0, password=None):
+    def __init__(self, host='localhost', port=6379, db=0, password=None, serializer=None,
+                 key_ttl: Optional[int] = None):
         self.host = host
         self.port = port
         self.db = db
         self.password = password
+        self.serializer = serializer or default_serializer
+        # Данные пункта, который долго не обновляется, истекают сами (0 - без TTL)
+        if key_ttl is None:
+            key_ttl = int(os.getenv('PARSER_KEY_TTL_SECONDS', str(2 * 24 * 3600)))
+        self.key_ttl = key_ttl
         self.redis_client = None
         self.connect()
     
     def connect(self):
         """Подключение к KeyDB"""
+        import redis
+        
         try:
             self.redis_client = redis.Redis(
                 host=self.host,
@@ -54,9 +185,9 @@ class KeyDBManager:
             )
             # Проверяем подключение
             self.redis_client.ping()
-            print(f"✅ Подключение к KeyDB успешно (host: {self.host}, port: {self.port})")
+            logger.info("Подключение к KeyDB успешно", extra={'host': self.host, 'port': self.port})
         except Exception as e:
-            print(f"❌ Ошибка подключения к KeyDB: {e}")
+            logger.error("Ошибка подключения к KeyDB", extra={'host': self.host, 'port': self.port, 'error': str(e)})
             self.redis_client = None
     
     def is_connected(self) -> bool:
@@ -69,60 +200,331 @@ class KeyDBManager:
         except:
             return False
     
-    def save_checkpoint_data(self, checkpoint_data: Dict) -> bool:
-        """Сохранение данных пункта пропуска в KeyDB"""
+    def save_checkpoint_data(self, checkpoint_data: Union[Dict, CheckpointSnapshot],
+                             fetched_at: Optional[datetime] = None) -> bool:
+        """Сохранение данных пункта пропуска в KeyDB.
+        
+        fetched_at задается при повторном парсинге архива: страница не пишется,
+        если в KeyDB данные не старее ее, last_updated берется из fetched_at,
+        а скользящая статистика не обновляется (исторические данные - не новый цикл).
+        """
         if not self.is_connected():
-            print("❌ KeyDB не подключен")
+            logger.error("KeyDB не подключен")
             return False
         
+        if isinstance(checkpoint_data, CheckpointSnapshot):
+            checkpoint_data = {
+                'url': checkpoint_data.url,
+                'basic_info': checkpoint_data.basic_info,
+                'statistics': checkpoint_data.statistics.to_dict(),
+                'load_data': checkpoint_data.load_data
+            }
+        
         try:
             url = checkpoint_data.get('url', '')
             checkpoint_id = self.extract_checkpoint_id(url)
             
             if not checkpoint_id:
-                print(f"❌ Не удалось извлечь ID из URL: {url}")
+                logger.error("Не удалось извлечь ID из URL", extra={'url': url})
                 return False
             
             # Основные данные пункта пропуска
             key_prefix = f"checkpoint:{checkpoint_id}"
+            basic_info = checkpoint_data.get('basic_info', {})
+            statistics = checkpoint_data.get('statistics', {})
+            load_data = [day.to_dict() if isinstance(day, DayLoad) else day
+                         for day in checkpoint_data.get('load_data', [])]
+            
+            # Прежние индексируемые поля, чтобы убрать пункт из устаревших индексов
+            read_pipe = self.redis_client.pipeline(transaction=False)
+            read_pipe.hmget(f"{key_prefix}:info", 'border_country', 'status')
+            read_pipe.hmget(f"{key_prefix}:meta", 'indexed_dates', 'last_updated')
+            read_pipe.hgetall(f"{key_prefix}:trend")
+            (old_country, old_status), (old_dates, last_updated), trend = read_pipe.execute()
+            
+            if fetched_at is not None and last_updated and last_updated >= fetched_at.isoformat():
+                logger.debug("Страница из архива старше данных в KeyDB", extra={
+                    'checkpoint_id': checkpoint_id,
+                    'fetched_at': fetched_at.isoformat(),
+                    'last_updated': last_updated
+                })
+                return False
+            old_info = {
+                'border_country': old_country,
+                'status': old_status,
+                'indexed_dates': old_dates.split(',') if old_dates else []
+            }
+            
+            # Данные и индексы пишем одной транзакцией, чтобы они не расходились
+            pipe = self.redis_client.pipeline(transaction=True)
             
             # Сохраняем основную информацию
-            basic_info = checkpoint_data.get('basic_info', {})
             if basic_info:
-                self.redis_client.hset(f"{key_prefix}:info", mapping=basic_info)
+                pipe.hset(f"{key_prefix}:info", mapping=basic_info)
             
             # Сохраняем статистику
-            statistics = checkpoint_data.get('statistics', {})
             if statistics:
-                self.redis_client.hset(f"{key_prefix}:stats", mapping=statistics)
+                pipe.hset(f"{key_prefix}:stats", mapping=statistics)
             
             # Сохраняем данные загруженности
-            load_data = checkpoint_data.get('load_data', [])
             if load_data:
-                # Очищаем старые данные
-                self.redis_client.delete(f"{key_prefix}:load_data")
-                # Сохраняем новые данные
-                for i, day_data in enumerate(load_data):
-                    self.redis_client.hset(f"{key_prefix}:load_data", i, json.dumps(day_data, ensure_ascii=False))
+                # Очищаем старые данные и сохраняем новые одной командой
+                pipe.delete(f"{key_prefix}:load_data")
+                pipe.hset(f"{key_prefix}:load_data", mapping={
+                    i: self.serializer.dumps(day_data) for i, day_data in enumerate(load_data)
+                })
             
             # Метаданные
             metadata = {
-                'last_updated': datetime.now().isoformat(),
+                'last_updated': (fetched_at or datetime.now()).isoformat(),
                 'url': url,
                 'data_count': len(load_data)
             }
-            self.redis_client.hset(f"{key_prefix}:meta", mapping=metadata)
+            if load_data:
+                metadata['indexed_dates'] = ','.join(sorted({day['date'] for day in load_data if day.get('date')}))
+            pipe.hset(f"{key_prefix}:meta", mapping=metadata)
+            
+            # Скользящая статистика: O(1) от прежнего состояния, без истории
+            if fetched_at is None:
+                if load_data:
+                    pipe.hset(f"{key_prefix}:trend", mapping=update_trend(trend, statistics, load_data, self.serializer))
+                pipe.hincrby(f"{key_prefix}:trend", 'cycles', 1)
             
             # Добавляем в список всех пунктов пропуска
-            self.redis_client.sadd("checkpoints:all", checkpoint_id)
+            pipe.sadd("checkpoints:all", checkpoint_id)
             
-            print(f"✅ Данные сохранены в KeyDB: {basic_info.get('name_ru', checkpoint_id)}")
+            # Вторичные индексы
+            self.queue_index_updates(pipe, checkpoint_id, old_info, basic_info, statistics, load_data)
+            self.queue_ttl_refresh(pipe, checkpoint_id)
+            pipe.execute()
+            
+            logger.debug("Данные сохранены в KeyDB", extra={'checkpoint_id': checkpoint_id, 'days': len(load_data)})
             return True
             
         except Exception as e:
-            print(f"❌ Ошибка сохранения в KeyDB: {e}")
+            logger.error("Ошибка сохранения в KeyDB", extra={'url': checkpoint_data.get('url', ''), 'error': str(e)})
             return False
     
+    def queue_index_updates(self, pipe, checkpoint_id: str, old_info: Dict, basic_info: Dict,
+                            statistics: Dict, load_data: List[Dict]):
+        """Добавление в pipeline обновлений вторичных индексов пункта пропуска"""
+        country = basic_info.get('border_country') or old_info.get('border_country')
+        status = basic_info.get('status') or old_info.get('status')
+        
+        # Пункт сменил страну или статус - убираем из старых индексов
+        old_country = old_info.get('border_country')
+        if old_country and old_country != country:
+            pipe.srem(f"checkpoints:country:{old_country}", checkpoint_id)
+            for metric in INDEX_METRICS:
+                pipe.zrem(f"checkpoints:rank:{metric}:{old_country}", checkpoint_id)
+        
+        old_status = old_info.get('status')
+        if old_status and old_status != status:
+            pipe.srem(f"checkpoints:status:{old_status}", checkpoint_id)
+        
+        if country:
+            pipe.sadd(f"checkpoints:country:{country}", checkpoint_id)
+        if status:
+            pipe.sadd(f"checkpoints:status:{status}", checkpoint_id)
+        
+        # Геоиндекс по координатам пункта пропуска
+        if basic_info.get('latitude') is not None and basic_info.get('longitude') is not None:
+            pipe.geoadd("checkpoints:geo", (float(basic_info['longitude']), float(basic_info['latitude']), checkpoint_id))
+        
+        # Без новых данных загруженности рейтинги не трогаем: в KeyDB остаются прежние данные
+        if not load_data:
+            return
+        
+        scores = self.index_scores(statistics, load_data)
+        for metric in INDEX_METRICS:
+            keys = [f"checkpoints:rank:{metric}"]
+            if country:
+                keys.append(f"checkpoints:rank:{metric}:{country}")
+            for key in keys:
+                if metric in scores:
+                    pipe.zadd(key, {checkpoint_id: scores[metric]})
+                else:
+                    pipe.zrem(key, checkpoint_id)
+        
+        # Индекс по датам: checkpoints:date:{YYYY-MM-DD} -> пункт со счетом available_1mrp
+        today = date.today()
+        new_dates = set()
+        for day in load_data:
+            day_date = day.get('date')
+            if not day_date or day_date < today.isoformat():
+                continue
+            new_dates.add(day_date)
+            key = f"checkpoints:date:{day_date}"
+            if day.get('is_holiday'):
+                pipe.zrem(key, checkpoint_id)
+                continue
+            pipe.zadd(key, {checkpoint_id: day.get('available_1mrp', 0)})
+            # Ключ даты живет до конца следующего дня и потом удаляется сам
+            expire_at = datetime.combine(date.fromisoformat(day_date) + timedelta(days=2), datetime.min.time())
+            pipe.expireat(key, int(expire_at.timestamp()))
+        
+        for old_date in old_info.get('indexed_dates', []):
+            if old_date not in new_dates:
+                pipe.zrem(f"checkpoints:date:{old_date}", checkpoint_id)
+    
+    def queue_ttl_refresh(self, pipe, checkpoint_id: str):
+        """Добавление в pipeline продления TTL хэшей пункта пропуска"""
+        if self.key_ttl <= 0:
+            return
+        for suffix in CHECKPOINT_KEY_SUFFIXES:
+            pipe.expire(f"checkpoint:{checkpoint_id}:{suffix}", self.key_ttl)
+    
+    def index_scores(self, statistics: Dict, load_data: List[Dict]) -> Dict:
+        """Значения метрик для рейтингов пункта пропуска"""
+        scores = {}
+        for metric in ('avg_1mrp', 'avg_100mrp'):
+            if statistics.get(metric) is not None:
+                scores[metric] = float(statistics[metric])
+        
+        # Ближайший будущий день со свободными слотами за 1 МРП (порядковый номер даты,
+        # сравним между пунктами и не устаревает со временем)
+        today = date.today().isoformat()
+        available_dates = [day['date'] for day in load_data
+                           if day.get('date') and day['date'] >= today
+                           and not day.get('is_holiday') and day.get('available_1mrp', 0) > 0]
+        if available_dates:
+            scores['next_available'] = date.fromisoformat(min(available_dates)).toordinal()
+        
+        return scores
+    
+    def get_checkpoints_by_country(self, country: str) -> List[str]:
+        """ID пунктов пропуска на границе с указанной страной"""
+        if not self.is_connected():
+            return []
+        
+        try:
+            return list(self.redis_client.smembers(f"checkpoints:country:{country}"))
+        except Exception as e:
+            logger.error("Ошибка чтения индекса по стране", extra={'country': country, 'error': str(e)})
+            return []
+    
+    def get_checkpoints_by_status(self, status: str) -> List[str]:
+        """ID пунктов пропуска с указанным статусом"""
+        if not self.is_connected():
+            return []
+        
+        try:
+            return list(self.redis_client.smembers(f"checkpoints:status:{status}"))
+        except Exception as e:
+            logger.error("Ошибка чтения индекса по статусу", extra={'status': status, 'error': str(e)})
+            return []
+    
+    def get_ranked_checkpoints(self, metric: str = 'avg_1mrp', limit: int = 10, country: Optional[str] = None,
+                               descending: bool = True) -> List[tuple]:
+        """Рейтинг пунктов пропуска по метрике: список (ID, значение).
+        
+        Для avg_1mrp / avg_100mrp обычно нужен descending=True (больше слотов),
+        для next_available - descending=False (самый ранний свободный день);
+        значение next_available - порядковый номер даты (date.fromordinal),
+        прошедшие даты в рейтинг не попадают.
+        """
+        if metric not in INDEX_METRICS:
+            raise ValueError(f"Неизвестная метрика рейтинга: {metric}")
+        if not self.is_connected():
+            return []
+        
+        key = f"checkpoints:rank:{metric}:{country}" if country else f"checkpoints:rank:{metric}"
+        # Для next_available отсекаем прошедшие дни у пунктов, не обновлявшихся с тех пор
+        min_score = date.today().toordinal() if metric == 'next_available' else '-inf'
+        try:
+            if descending:
+                return self.redis_client.zrevrangebyscore(key, '+inf', min_score, start=0, num=limit,
+                                                          withscores=True)
+            return self.redis_client.zrangebyscore(key, min_score, '+inf', start=0, num=limit,
+                                                   withscores=True)
+        except Exception as e:
+            logger.error("Ошибка чтения рейтинга", extra={'metric': metric, 'error': str(e)})
+            return []
+    
+    def get_available_on_date(self, day: Union[str, date], min_1mrp: int = 1, limit: Optional[int] = None,
+                              country: Optional[str] = None) -> List[tuple]:
+        """Пункты пропуска со свободными слотами на дату: список (ID, слотов за 1 МРП) по убыванию"""
+        if not self.is_connected():
+            return []
+        
+        day_text = day.isoformat() if isinstance(day, date) else day
+        try:
+            matches = self.redis_client.zrevrangebyscore(
+                f"checkpoints:date:{day_text}", '+inf', min_1mrp,
+                withscores=True,
+                start=0 if limit and not country else None,
+                num=limit if limit and not country else None
+            )
+            if country:
+                country_ids = self.redis_client.smembers(f"checkpoints:country:{country}")
+                matches = [match for match in matches if match[0] in country_ids][:limit]
+            return [(checkpoint_id, int(available)) for checkpoint_id, available in matches]
+        except Exception as e:
+            logger.error("Ошибка чтения индекса по дате", extra={'date': day_text, 'error': str(e)})
+            return []
+    
+    def get_checkpoints_within_radius(self, latitude: float, longitude: float, radius_km: float,
+                                      limit: Optional[int] = None) -> List[tuple]:
+        """Пункты пропуска в радиусе от точки: список (ID, расстояние в км) по возрастанию"""
+        if not self.is_connected():
+            return []
+        
+        try:
+            matches = self.redis_client.geosearch(
+                "checkpoints:geo",
+                longitude=longitude,
+                latitude=latitude,
+                radius=radius_km,
+                unit='km',
+                sort='ASC',
+                count=limit,
+                withdist=True
+            )
+            return [(checkpoint_id, float(distance)) for checkpoint_id, distance in matches]
+        except Exception as e:
+            logger.error("Ошибка геопоиска", extra={'error': str(e)})
+            return []
+    
+    def get_nearest_checkpoints(self, latitude: float, longitude: float, count: int = 5,
+                                max_radius_km: float = 3000) -> List[tuple]:
+        """Ближайшие пункты пропуска к точке: список (ID, расстояние в км)"""
+        return self.get_checkpoints_within_radius(latitude, longitude, max_radius_km, limit=count)
+    
+    def get_nearest_available_checkpoints(self, latitude: float, longitude: float, count: int = 1,
+                                          status: Optional[str] = None,
+                                          max_radius_km: float = 3000) -> List[tuple]:
+        """Ближайшие пункты пропуска со свободными слотами за 1 МРП.
+        
+        Возвращает список (ID, расстояние в км, дата ближайшего свободного дня).
+        Если указан status, учитываются только пункты с этим статусом.
+        """
+        candidates = self.get_checkpoints_within_radius(latitude, longitude, max_radius_km)
+        if not candidates:
+            return []
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for checkpoint_id, _ in candidates:
+                pipe.zscore("checkpoints:rank:next_available", checkpoint_id)
+                if status:
+                    pipe.sismember(f"checkpoints:status:{status}", checkpoint_id)
+            replies = pipe.execute()
+        except Exception as e:
+            logger.error("Ошибка геопоиска", extra={'error': str(e)})
+            return []
+        
+        step = 2 if status else 1
+        today = date.today().toordinal()
+        result = []
+        for i, (checkpoint_id, distance) in enumerate(candidates):
+            next_available = replies[i * step]
+            if next_available is None or next_available < today or (status and not replies[i * step + 1]):
+                continue
+            result.append((checkpoint_id, distance, date.fromordinal(int(next_available))))
+            if len(result) >= count:
+                break
+        return result
+    
     def extract_checkpoint_id(self, url: str) -> str:
         """Извлечение ID пункта пропуска из URL"""
         try:
@@ -134,6 +536,173 @@ class KeyDBManager:
         except:
             return ""
     
+    def get_cycle_state(self) -> Dict:
+        """Состояние текущего (или последнего) цикла обновления"""
+        if not self.is_connected():
+            return {}
+        
+        try:
+            return self.redis_client.hgetall("parser:cycle")
+        except Exception as e:
+            logger.warning("Ошибка чтения состояния цикла", extra={'error': str(e)})
+            return {}
+    
+    def save_cycle_state(self, state: Dict, reset: bool = False):
+        """Сохранение состояния цикла обновления (reset - начать новый цикл)"""
+        if not self.is_connected():
+            return
+        
+        try:
+            pipe = self.redis_client.pipeline()
+            if reset:
+                pipe.delete("parser:cycle")
+            pipe.hset("parser:cycle", mapping=state)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Ошибка сохранения состояния цикла", extra={'error': str(e)})
+    
+    def get_fetch_state(self, checkpoint_id: str) -> Dict:
+        """Состояние загрузки страницы пункта пропуска (валидаторы, хэш, ошибки)"""
+        if not self.is_connected() or not checkpoint_id:
+            return {}
+        
+        try:
+            return self.redis_client.hgetall(f"checkpoint:{checkpoint_id}:fetch")
+        except Exception as e:
+            logger.warning("Ошибка чтения состояния загрузки", extra={'checkpoint_id': checkpoint_id, 'error': str(e)})
+            return {}
+    
+    def save_fetch_state(self, checkpoint_id: str, state: Dict):
+        """Сохранение состояния загрузки страницы пункта пропуска"""
+        if not self.is_connected() or not checkpoint_id:
+            return
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(f"checkpoint:{checkpoint_id}:fetch", mapping=state)
+            # TTL продлевается только успешной загрузкой, ошибки его не трогают
+            if state.get('last_success') and self.key_ttl > 0:
+                pipe.expire(f"checkpoint:{checkpoint_id}:fetch", self.key_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Ошибка сохранения состояния загрузки", extra={'checkpoint_id': checkpoint_id, 'error': str(e)})
+    
+    def mark_checkpoint_fresh(self, checkpoint_id: str):
+        """Обновление времени актуальности без перезаписи данных"""
+        if not self.is_connected() or not checkpoint_id:
+            return
+        
+        try:
+            # Скользящая статистика идет по времени: подаем сохраненные значения метрик
+            read_pipe = self.redis_client.pipeline(transaction=False)
+            read_pipe.hmget(f"checkpoint:{checkpoint_id}:stats", *TREND_METRICS)
+            read_pipe.hgetall(f"checkpoint:{checkpoint_id}:trend")
+            values, trend = read_pipe.execute()
+            statistics = {metric: value for metric, value in zip(TREND_METRICS, values) if value is not None}
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(f"checkpoint:{checkpoint_id}:meta", 'last_updated', datetime.now().isoformat())
+            if statistics:
+                pipe.hset(f"checkpoint:{checkpoint_id}:trend",
+                          mapping=update_trend(trend, statistics, None, self.serializer))
+            # Цикл без изменений тоже учитывается в частоте изменений
+            pipe.hincrby(f"checkpoint:{checkpoint_id}:trend", 'cycles', 1)
+            self.queue_ttl_refresh(pipe, checkpoint_id)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Ошибка обновления метаданных", extra={'checkpoint_id': checkpoint_id, 'error': str(e)})
+    
+    def pop_profile_request(self) -> int:
+        """Чтение и снятие флага профилирования parser:profile (количество циклов)"""
+        if not self.is_connected():
+            return 0
+        
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.get("parser:profile")
+            pipe.delete("parser:profile")
+            value, _ = pipe.execute()
+            return int(value) if value else 0
+        except Exception as e:
+            logger.warning("Ошибка чтения флага профилирования", extra={'error': str(e)})
+            return 0
+    
+    def sweep_orphans(self, live_ids: set, batch_size: int = 100) -> Dict:
+        """
+        Удаление пунктов пропуска, которых нет в live_ids или чьи данные истекли.
+        
+        Удаляются хэши пункта, членство в checkpoints:all и во всех индексах.
+        Работает пачками, чтобы не блокировать KeyDB большими командами.
+        """
+        result = {'checked': 0, 'removed': 0}
+        # Пустой список ссылок скорее ошибка чтения, чем повод удалить все
+        if not self.is_connected() or not live_ids:
+            return result
+        
+        try:
+            index_keys = [key for key in self.redis_client.scan_iter(match="checkpoints:*", count=500)
+                          if key != "checkpoints:all"]
+            type_pipe = self.redis_client.pipeline(transaction=False)
+            for key in index_keys:
+                type_pipe.type(key)
+            index_types = dict(zip(index_keys, type_pipe.execute()))
+            
+            checkpoint_ids = list(self.redis_client.sscan_iter("checkpoints:all", count=batch_size))
+            for start in range(0, len(checkpoint_ids), batch_size):
+                batch = checkpoint_ids[start:start + batch_size]
+                result['checked'] += len(batch)
+                
+                # :meta пишется при каждом успешном сохранении (в отличие от :info,
+                # который пропускается без основной информации), по нему и судим об истечении
+                exists_pipe = self.redis_client.pipeline(transaction=False)
+                for checkpoint_id in batch:
+                    exists_pipe.exists(f"checkpoint:{checkpoint_id}:meta")
+                orphans = [checkpoint_id for checkpoint_id, exists in zip(batch, exists_pipe.execute())
+                           if checkpoint_id not in live_ids or not exists]
+                if orphans:
+                    self.delete_checkpoints(orphans, index_types)
+                    result['removed'] += len(orphans)
+        except Exception as e:
+            logger.error("Ошибка очистки устаревших пунктов пропуска", extra={'error': str(e)})
+        
+        return result
+    
+    def delete_checkpoints(self, checkpoint_ids: List[str], index_types: Dict[str, str]):
+        """Удаление пачки пунктов пропуска со всеми ключами и индексами"""
+        pipe = self.redis_client.pipeline(transaction=True)
+        pipe.delete(*[f"checkpoint:{checkpoint_id}:{suffix}"
+                      for checkpoint_id in checkpoint_ids for suffix in CHECKPOINT_KEY_SUFFIXES])
+        pipe.srem("checkpoints:all", *checkpoint_ids)
+        for key, key_type in index_types.items():
+            if key_type == 'set':
+                pipe.srem(key, *checkpoint_ids)
+            elif key_type == 'zset':
+                pipe.zrem(key, *checkpoint_ids)
+        pipe.execute()
+    
+    def get_trend(self, checkpoint_id: str) -> Dict:
+        """Скользящая статистика пункта пропуска (без внутреннего состояния)"""
+        if not self.is_connected():
+            return {}
+        
+        try:
+            trend = self.redis_client.hgetall(f"checkpoint:{checkpoint_id}:trend")
+        except Exception as e:
+            logger.error("Ошибка получения скользящей статистики", extra={'checkpoint_id': checkpoint_id, 'error': str(e)})
+            return {}
+        
+        result = {}
+        for field, value in trend.items():
+            if field in TREND_METRICS or field == 'fingerprint':
+                continue
+            try:
+                result[field] = int(value) if field in ('cycles', 'changes') else float(value)
+            except ValueError:
+                result[field] = value
+        if result.get('cycles'):
+            result['change_rate'] = round(result.get('changes', 0) / result['cycles'], 3)
+        return result
+    
     def get_all_checkpoints(self) -> List[str]:
         """Получение списка всех ID пунктов пропуска"""
         if not self.is_connected():
@@ -142,7 +711,7 @@ class KeyDBManager:
         try:
             return list(self.redis_client.smembers("checkpoints:all"))
         except Exception as e:
-            print(f"❌ Ошибка получения списка пунктов пропуска: {e}")
+            logger.error("Ошибка получения списка пунктов пропуска", extra={'error': str(e)})
             return []
     
     def get_checkpoint_data(self, checkpoint_id: str) -> Optional[Dict]:
@@ -161,28 +730,65 @@ class KeyDBManager:
             
             # Получаем данные загруженности
             load_data_raw = self.redis_client.hgetall(f"{key_prefix}:load_data")
-            load_data = []
-            for i in sorted(load_data_raw.keys(), key=int):
-                try:
-                    load_data.append(json.loads(load_data_raw[i]))
-                except:
-                    pass
             
             # Получаем метаданные
             meta = self.redis_client.hgetall(f"{key_prefix}:meta")
             
-            return {
-                'checkpoint_id': checkpoint_id,
-                'basic_info': basic_info,
-                'statistics': stats,
-                'load_data': load_data,
-                'metadata': meta
-            }
+            return self.build_checkpoint_data(checkpoint_id, basic_info, stats, load_data_raw, meta)
             
         except Exception as e:
-            print(f"❌ Ошибка получения данных пункта пропуска {checkpoint_id}: {e}")
+            logger.error("Ошибка получения данных пункта пропуска", extra={'checkpoint_id': checkpoint_id, 'error': str(e)})
             return None
     
+    def build_checkpoint_data(self, checkpoint_id: str, basic_info: Dict, stats: Dict,
+                              load_data_raw: Dict, meta: Dict) -> Dict:
+        """Сборка данных пункта пропуска из прочитанных хэшей"""
+        load_data = []
+        for i in sorted(load_data_raw.keys(), key=int):
+            try:
+                load_data.append(self.serializer.loads(load_data_raw[i]))
+            except:
+                pass
+        
+        return {
+            'checkpoint_id': checkpoint_id,
+            'basic_info': basic_info,
+            'statistics': stats,
+            'load_data': load_data,
+            'metadata': meta
+        }
+    
+    def iter_checkpoints(self, batch_size: int = 100) -> Iterator[Dict]:
+        """Потоковое чтение всех пунктов пропуска пачками через pipeline"""
+        if not self.is_connected():
+            return
+        
+        batch = []
+        for checkpoint_id in self.redis_client.sscan_iter("checkpoints:all", count=batch_size):
+            batch.append(checkpoint_id)
+            if len(batch) >= batch_size:
+                yield from self.read_checkpoint_batch(batch)
+                batch = []
+        
+        if batch:
+            yield from self.read_checkpoint_batch(batch)
+    
+    def read_checkpoint_batch(self, checkpoint_ids: List[str]) -> List[Dict]:
+        """Чтение пачки пунктов пропуска за один round-trip"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for checkpoint_id in checkpoint_ids:
+            key_prefix = f"checkpoint:{checkpoint_id}"
+            pipe.hgetall(f"{key_prefix}:info")
+            pipe.hgetall(f"{key_prefix}:stats")
+            pipe.hgetall(f"{key_prefix}:load_data")
+            pipe.hgetall(f"{key_prefix}:meta")
+        replies = pipe.execute()
+        
+        return [
+            self.build_checkpoint_data(checkpoint_id, *replies[i * 4:(i + 1) * 4])
+            for i, checkpoint_id in enumerate(checkpoint_ids)
+        ]
+    
     def get_summary_stats(self) -> Dict:
         """Получение сводной статистики"""
         if not self.is_connected():
@@ -223,93 +829,164 @@ class KeyDBManager:
             }
             
         except Exception as e:
-            print(f"❌ Ошибка получения сводной статистики: {e}")
+            logger.error("Ошибка получения сводной статистики", extra={'error': str(e)})
             return {}
 
 class CheckpointWebParser:
     """Парсер для извлечения данных о загруженности пункта пропуска с веб-страницы"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        })
+    def __init__(self, serializer=None, html_archive: Optional[HtmlArchive] = None):
+        self.serializer = serializer or default_serializer
+        self.html_archive = html_archive
+        self._session = None
+        # Статус и валидаторы последнего ответа (ETag, Last-Modified)
+        self.last_response_info = {}
+    
+    @property
+    def session(self):
+        """HTTP-сессия (создается при первой загрузке страницы)"""
+        if self._session is None:
+            import requests
+            
+            self._session = requests.Session()
+            self._session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1'
+            })
+        return self._session
     
-    def fetch_page_content(self, url: str, max_retries: int = 3) -> Optional[str]:
-        """Загрузка содержимого страницы с повторными попытками"""
+    def fetch_page_content(self, url: str, max_retries: int = 3, validators: Optional[Dict] = None) -> Optional[str]:
+        """Загрузка содержимого страницы с повторными попытками.
+        
+        При переданных валидаторах (etag, last_modified) выполняется условный
+        запрос; если страница не изменилась, возвращается None, а
+        last_response_info['status'] равен 304.
+        """
+        import requests
+        
+        headers = {}
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+        self.last_response_info = {}
+        
         for attempt in range(max_retries):
             try:
-                print(f"Попытка {attempt + 1}: Загрузка страницы...")
+                logger.debug("Загрузка страницы", extra={'url': url, 'attempt': attempt + 1})
                 # Отключаем SSL проверку для данного запроса
-                response = self.session.get(url, timeout=30, verify=False)
+                response = self.session.get(url, timeout=30, verify=False, headers=headers)
+                self.last_response_info = {
+                    'status': response.status_code,
+                    'etag': response.headers.get('ETag', ''),
+                    'last_modified': response.headers.get('Last-Modified', '')
+                }
+                if response.status_code == 304:
+                    response.close()
+                    return None
                 response.raise_for_status()
                 
-                print(f"Статус ответа: {response.status_code}")
-                print(f"Размер контента: {len(response.content)} байт")
-                
                 # Проверяем кодировку
-                if response.encoding:
-                    print(f"Кодировка: {response.encoding}")
-                else:
+                if not response.encoding:
                     response.encoding = 'utf-8'
                 
-                return response.text
+                logger.debug("Страница загружена", extra={
+                    'url': url,
+                    'status': response.status_code,
+                    'bytes': len(response.content),
+                    'encoding': response.encoding
+                })
+                
+                # Освобождаем сырые байты ответа сразу после декодирования
+                text = response.text
+                response.close()
+                del response
+                return text
                 
             except requests.exceptions.SSLError as e:
-                print(f"SSL ошибка (попытка {attempt + 1}): {e}")
-                print("Попробуйте установить сертификаты или используйте HTTP вместо HTTPS")
+                logger.warning("SSL ошибка при загрузке", extra={'url': url, 'attempt': attempt + 1, 'error': str(e)})
                 if attempt < max_retries - 1:
-                    print("Повторная попытка через 5 секунд...")
                     time.sleep(5)
             except requests.exceptions.RequestException as e:
-                print(f"Ошибка при загрузке (попытка {attempt + 1}): {e}")
+                logger.warning("Ошибка при загрузке", extra={'url': url, 'attempt': attempt + 1, 'error': str(e)})
                 if attempt < max_retries - 1:
-                    print("Повторная попытка через 5 секунд...")
                     time.sleep(5)
                 else:
-                    print("Все попытки загрузки исчерпаны")
+                    logger.error("Все попытки загрузки исчерпаны", extra={'url': url})
                     return None
     
     def parse_html_content(self, html_content: str, url: str = None) -> Dict:
         """Парсинг HTML контента"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        return self.parse_snapshot(html_content, url).to_dict()
+    
+    def static_fingerprint(self, html_content: str) -> str:
+        """Дешевый отпечаток основной информации: регулярка по HTML без построения дерева.
         
-        result = {
-            'url': url or 'https://cgr.qoldau.kz/ru/registry/checkpoint/list/224749863825000000/view',
-            'basic_info': self.parse_basic_info(soup),
-            'load_data': self.parse_load_data(soup),
-            'parsed_at': datetime.now().isoformat()
-        }
+        Пустая строка - поля не найдены, основная информация разбирается полностью.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        field_count = 0
+        for _, classes, value in STATIC_FIELD_PATTERN.findall(html_content):
+            if not STATIC_FIELD_CLASSES.issubset(classes.split()):
+                continue
+            field_count += 1
+            digest.update(value.strip().encode('utf-8'))
+            digest.update(b'\x00')
+        if field_count < STATIC_FIELD_MIN_COUNT:
+            return ''
+        phone_match = PHONE_PATTERN.search(html_content)
+        if phone_match:
+            digest.update(phone_match.group().encode('utf-8'))
+        return digest.hexdigest()
+    
+    def parse_snapshot(self, html_content: str, url: str = None,
+                       reference_date: Optional[date] = None,
+                       include_basic_info: bool = True) -> CheckpointSnapshot:
+        """Парсинг HTML контента в типизированный снимок.
         
-        # Добавляем статистику
-        working_days = [d for d in result['load_data'] if not d.get('is_holiday')]
-        holidays = [d for d in result['load_data'] if d.get('is_holiday')]
+        reference_date - дата загрузки страницы для дат без года (по умолчанию сегодня).
+        include_basic_info=False - разбирается только square-chart-container,
+        basic_info в снимке пустой (основная информация в KeyDB не перезаписывается).
+        """
+        from bs4 import BeautifulSoup, SoupStrainer
         
-        result['statistics'] = {
-            'total_days': len(result['load_data']),
-            'working_days': len(working_days),
-            'holidays': len(holidays)
-        }
+        basic_info = {}
+        soup = None
+        if not include_basic_info:
+            soup = BeautifulSoup(html_content, 'html.parser',
+                                 parse_only=SoupStrainer('div', class_='square-chart-container'))
+            if soup.find('div', class_='square-chart-container') is None:
+                # Разметка изменилась - нужен полный разбор с поиском альтернативных контейнеров
+                soup.decompose()
+                soup = None
         
-        if working_days:
-            avg_1mrp = sum(d.get('available_1mrp', 0) for d in working_days) / len(working_days)
-            avg_100mrp = sum(d.get('available_100mrp', 0) for d in working_days) / len(working_days)
-            result['statistics']['avg_1mrp'] = round(avg_1mrp, 1)
-            result['statistics']['avg_100mrp'] = round(avg_100mrp, 1)
-            result['statistics']['max_1mrp'] = max(d.get('available_1mrp', 0) for d in working_days)
-            result['statistics']['min_1mrp'] = min(d.get('available_1mrp', 0) for d in working_days)
-            result['statistics']['max_100mrp'] = max(d.get('available_100mrp', 0) for d in working_days)
-            result['statistics']['min_100mrp'] = min(d.get('available_100mrp', 0) for d in working_days)
+        if soup is None:
+            soup = BeautifulSoup(html_content, 'html.parser')
+            include_basic_info = True
         
-        return result
+        try:
+            if include_basic_info:
+                basic_info = self.parse_basic_info(soup, html_content)
+            load_data = self.parse_day_records(soup, reference_date)
+        finally:
+            # Разрушаем дерево, чтобы не держать его до следующей сборки мусора
+            soup.decompose()
+            del soup
+        
+        return CheckpointSnapshot.build(
+            url=url or 'https://cgr.qoldau.kz/ru/registry/checkpoint/list/224749863825000000/view',
+            basic_info=basic_info,
+            load_data=load_data,
+            parsed_at=datetime.now().isoformat()
+        )
     
-    def parse_basic_info(self, soup: BeautifulSoup) -> Dict:
-        """Парсинг основной информации"""
+    def parse_basic_info(self, soup: 'BeautifulSoup', html_content: Optional[str] = None) -> Dict:
+        """Парсинг основной информации (телефон ищется в исходном HTML, если он передан)"""
         info = {}
         
         try:
@@ -330,8 +1007,7 @@ class CheckpointWebParser:
                     info['border_country'] = text
             
             # Поиск телефона
-            phone_pattern = re.compile(r'8-\(\d+\)-\d+-\d+-\d+')
-            phone_match = phone_pattern.search(str(soup))
+            phone_match = PHONE_PATTERN.search(html_content if html_content is not None else str(soup))
             if phone_match:
                 info['phone'] = phone_match.group()
             
@@ -343,19 +1019,27 @@ class CheckpointWebParser:
                     next_div = label.find_next('div', class_='form-control bg-light')
                     if next_div:
                         info['coordinates'] = next_div.get_text(strip=True)
+                        coordinates = parse_coordinates(info['coordinates'])
+                        if coordinates:
+                            info['latitude'], info['longitude'] = coordinates
                 elif 'Режим работы' in text:
                     next_div = label.find_next('div', class_='form-control bg-light')
                     if next_div:
                         info['working_hours'] = next_div.get_text(strip=True)
         
         except Exception as e:
-            print(f"Ошибка при парсинге основной информации: {e}")
+            logger.warning("Ошибка при парсинге основной информации", extra={'error': str(e)})
         
         return info
     
-    def parse_load_data(self, soup: BeautifulSoup) -> List[Dict]:
+    def parse_load_data(self, soup: 'BeautifulSoup') -> List[Dict]:
         """Парсинг данных загруженности"""
+        return [day.to_dict() for day in self.parse_day_records(soup)]
+    
+    def parse_day_records(self, soup: 'BeautifulSoup', reference_date: Optional[date] = None) -> List[DayLoad]:
+        """Парсинг данных загруженности в компактные записи"""
         load_data = []
+        reference_date = reference_date or date.today()
         
         try:
             # Ищем контейнер с данными загруженности
@@ -365,17 +1049,16 @@ class CheckpointWebParser:
                 container = soup.find('div', id='loadChart') or soup.find('div', class_='chart-container')
             
             if not container:
-                print("Контейнер загруженности не найден")
                 # Выводим доступные классы для отладки
                 all_divs = soup.find_all('div', class_=True)
                 classes = set()
                 for div in all_divs[:20]:  # Первые 20 для анализа
                     classes.update(div.get('class', []))
-                print(f"Найденные CSS классы: {sorted(classes)}")
+                logger.warning("Контейнер загруженности не найден", extra={'css_classes': ' '.join(sorted(classes))})
                 return load_data
             
             squares = container.find_all('div', class_='square')
-            print(f"Найдено квадратиков: {len(squares)}")
+            logger.debug("Найдены квадратики загруженности", extra={'squares': len(squares)})
             
             for i, square in enumerate(squares):
                 day_data = {'index': i}
@@ -384,7 +1067,7 @@ class CheckpointWebParser:
                 tooltip = square.get('title', '') or square.get('data-original-title', '') or square.get('data-bs-original-title', '')
                 if tooltip:
                     tooltip_decoded = html.unescape(tooltip)
-                    day_data.update(self.parse_tooltip(tooltip_decoded))
+                    day_data.update(self.parse_tooltip(tooltip_decoded, reference_date))
                 
                 # Уровень загруженности из CSS классов
                 classes = square.get('class', [])
@@ -408,29 +1091,26 @@ class CheckpointWebParser:
                     day_data['background_color'] = style
                 
                 if len(day_data) > 1:  # Если есть данные кроме индекса
-                    load_data.append(day_data)
+                    load_data.append(DayLoad.from_dict(day_data))
         
         except Exception as e:
-            print(f"Ошибка при парсинге загруженности: {e}")
+            logger.warning("Ошибка при парсинге загруженности", extra={'error': str(e)})
         
         return load_data
     
-    def parse_tooltip(self, tooltip: str) -> Dict:
+    def parse_tooltip(self, tooltip: str, reference_date: Optional[date] = None) -> Dict:
         """Парсинг tooltip с информацией о дне"""
         data = {}
         
         try:
             # Дата
-            date_patterns = [
-                r'(\d{1,2}\s+\w+\s+\d{4})',  # "1 декабря 2024"
-                r'(\d{1,2}\s+\w+)',          # "1 декабря"
-                r'(\d{1,2}\.\d{1,2}\.\d{4})', # "01.12.2024"
-            ]
-            
-            for pattern in date_patterns:
-                date_match = re.search(pattern, tooltip)
+            for pattern in TOOLTIP_DATE_PATTERNS:
+                date_match = pattern.search(tooltip)
                 if date_match:
                     data['date_text'] = date_match.group(1)
+                    iso_date = normalize_date_text(data['date_text'], reference_date)
+                    if iso_date:
+                        data['date'] = iso_date
                     break
             
             # Проверка на выходной день
@@ -456,7 +1136,7 @@ class CheckpointWebParser:
                         data[key] = int(match.group(1))
         
         except Exception as e:
-            print(f"Ошибка парсинга tooltip: {e}")
+            logger.warning("Ошибка парсинга tooltip", extra={'error': str(e)})
         
         return data
     
@@ -468,140 +1148,294 @@ class CheckpointWebParser:
         
         try:
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"Данные сохранены в {filename}")
+                self.serializer.dump_file(data, f, indent=2)
+            logger.info("Данные сохранены в файл", extra={'file': filename})
             return filename
         except Exception as e:
-            print(f"Ошибка сохранения: {e}")
+            logger.error("Ошибка сохранения в файл", extra={'file': filename, 'error': str(e)})
             return ""
     
-    def save_html_backup(self, html_content: str, filename: str = None) -> str:
-        """Сохранение HTML для отладки"""
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f'checkpoint_backup_{timestamp}.html'
+    def save_html_backup(self, html_content: str, checkpoint_id: str = 'unknown') -> str:
+        """Сохранение HTML в архив для отладки, возвращает хэш страницы"""
+        if self.html_archive is None:
+            return ""
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            print(f"HTML сохранен в {filename}")
-            return filename
+            return self.html_archive.store(checkpoint_id, html_content)
         except Exception as e:
-            print(f"Ошибка сохранения HTML: {e}")
+            logger.warning("Ошибка сохранения HTML", extra={'checkpoint_id': checkpoint_id, 'error': str(e)})
             return ""
 
-def process_single_checkpoint(parser: CheckpointWebParser, keydb_manager: KeyDBManager, url: str, index: int, total: int) -> Dict:
-    """Обработка одного пункта пропуска"""
-    print(f"\n[{index}/{total}] Обработка: {url}")
-    print("-" * 60)
+def process_single_checkpoint(parser: CheckpointWebParser, keydb_manager: KeyDBManager, url: str, index: int, total: int,
+                              fresh_seconds: float = 0, info_refresh_seconds: float = 0,
+                              archive_html: bool = True) -> Dict:
+    """Обработка одного пункта пропуска.
+    
+    info_refresh_seconds > 0 включает многоуровневый разбор: основная информация
+    разбирается заново только при смене ее отпечатка или раз в info_refresh_seconds,
+    в остальных циклах разбирается только график загруженности.
+    archive_html=False пропускает архив HTML (нехватка памяти).
+    """
+    logger.debug("Обработка пункта пропуска", extra={'url': url, 'index': index, 'total': total})
+    
+    checkpoint_id = keydb_manager.extract_checkpoint_id(url)
+    fetch_state = keydb_manager.get_fetch_state(checkpoint_id)
     
-    # Загружаем страницу
-    html_content = parser.fetch_page_content(url)
+    # Данные еще свежие (например, после перезапуска посреди цикла)
+    if fresh_seconds and fetch_state.get('last_success'):
+        age = (datetime.now() - datetime.fromisoformat(fetch_state['last_success'])).total_seconds()
+        if age < fresh_seconds:
+            return {'url': url, 'success': True, 'skipped': 'fresh'}
+    
+    # Загружаем страницу. Условный запрос - только если прошлый разбор сделан текущей
+    # версией парсера: иначе 304 навсегда закрепил бы данные старого формата
+    parsed_current = (fetch_state.get('parser_version') == PARSER_DATA_VERSION
+                      and bool(fetch_state.get('content_hash')))
+    html_content = parser.fetch_page_content(url, validators=fetch_state if parsed_current else None)
+    response_info = parser.last_response_info
+    
+    if response_info.get('status') == 304:
+        keydb_manager.mark_checkpoint_fresh(checkpoint_id)
+        keydb_manager.save_fetch_state(checkpoint_id, {
+            'last_success': datetime.now().isoformat(),
+            'error_streak': 0
+        })
+        return {'url': url, 'success': True, 'skipped': 'not_modified'}
     
     if not html_content:
-        print(f"❌ Не удалось загрузить страницу {url}")
+        logger.error("Не удалось загрузить страницу", extra={'url': url})
+        keydb_manager.save_fetch_state(checkpoint_id, {
+            'last_error': datetime.now().isoformat(),
+            'error_streak': int(fetch_state.get('error_streak', 0)) + 1
+        })
         return {'url': url, 'error': 'Failed to fetch page', 'success': False}
     
+    content_hash = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+    new_fetch_state = {
+        'last_success': datetime.now().isoformat(),
+        'content_hash': content_hash,
+        'etag': response_info.get('etag', ''),
+        'last_modified': response_info.get('last_modified', ''),
+        'parser_version': PARSER_DATA_VERSION,
+        'error_streak': 0
+    }
+    
+    # Страница не изменилась с прошлого разбора - парсить и перезаписывать нечего
+    if parsed_current and content_hash == fetch_state.get('content_hash'):
+        keydb_manager.mark_checkpoint_fresh(checkpoint_id)
+        keydb_manager.save_fetch_state(checkpoint_id, new_fetch_state)
+        return {'url': url, 'success': True, 'skipped': 'unchanged'}
+    
+    # Архивируем страницу для отладки и повторного парсинга
+    if archive_html and parser.html_archive is not None:
+        parser.save_html_backup(html_content, checkpoint_id or 'unknown')
+    
+    # Основная информация почти не меняется: разбираем ее, только если изменился
+    # отпечаток, сменилась версия парсера или истек интервал обновления
+    # (пустой отпечаток - разметка не распознана, разбираем всегда)
+    info_fingerprint = parser.static_fingerprint(html_content)
+    refresh_info = True
+    if (info_refresh_seconds and info_fingerprint and info_fingerprint == fetch_state.get('info_fingerprint')
+            and fetch_state.get('parser_version') == PARSER_DATA_VERSION and fetch_state.get('info_parsed_at')):
+        info_age = (datetime.now() - datetime.fromisoformat(fetch_state['info_parsed_at'])).total_seconds()
+        refresh_info = info_age >= info_refresh_seconds
+    
     # Парсим содержимое
-    print("Парсинг данных...")
-    result = parser.parse_html_content(html_content, url)
-    result['success'] = True
+    snapshot = parser.parse_snapshot(html_content, url, include_basic_info=refresh_info)
+    del html_content
+    
+    new_fetch_state['info_fingerprint'] = info_fingerprint
+    if snapshot.basic_info:
+        new_fetch_state['info_parsed_at'] = new_fetch_state['last_success']
     
     # Сохраняем в KeyDB
+    saved = False
     if keydb_manager.is_connected():
-        saved = keydb_manager.save_checkpoint_data(result)
-        if not saved:
-            print("⚠️  Не удалось сохранить в KeyDB")
-    else:
-        print("⚠️  KeyDB не подключен, данные не сохранены")
-    
-    # Выводим краткие результаты
-    basic_info = result.get('basic_info', {})
-    if basic_info.get('name_ru'):
-        print(f"✅ Пункт пропуска: {basic_info['name_ru']}")
+        saved = keydb_manager.save_checkpoint_data(snapshot)
+        if saved:
+            keydb_manager.save_fetch_state(checkpoint_id, new_fetch_state)
+        else:
+            logger.warning("Не удалось сохранить в KeyDB", extra={'url': url})
     else:
-        print("⚠️  Название не найдено")
+        logger.warning("KeyDB не подключен, данные не сохранены", extra={'url': url})
     
-    stats = result.get('statistics', {})
-    print(f"📊 Дней обработано: {stats.get('total_days', 0)} (рабочих: {stats.get('working_days', 0)})")
+    # Краткие результаты по пункту пропуска: дни обратно в словари не разворачиваем
+    basic_info = snapshot.basic_info
+    if basic_info and not basic_info.get('name_ru'):
+        logger.warning("Название пункта пропуска не найдено", extra={'url': url})
     
-    if stats.get('avg_1mrp'):
-        print(f"📈 Среднее за 1 МРП: {stats['avg_1mrp']}")
+    if logger.isEnabledFor(logging.DEBUG):
+        stats = snapshot.statistics.to_dict()
+        logger.debug("Пункт пропуска обработан", extra={
+            'url': url,
+            'checkpoint_name': basic_info.get('name_ru', ''),
+            'total_days': stats.get('total_days', 0),
+            'working_days': stats.get('working_days', 0),
+            'avg_1mrp': stats.get('avg_1mrp'),
+            'saved': saved
+        })
     
-    return result
+    return {'url': url, 'success': True, 'saved': saved}
 
-def update_all_checkpoints(keydb_host='localhost', keydb_port=6379, keydb_password=None):
-    """Обновление всех пунктов пропуска"""
-    print("\n" + "=" * 60)
-    print("🔄 ОБНОВЛЕНИЕ ДАННЫХ ПУНКТОВ ПРОПУСКА")
-    print("=" * 60)
-    
-    parser = CheckpointWebParser()
+def update_all_checkpoints(keydb_host='localhost', keydb_port=6379, keydb_password=None) -> Dict:
+    """Обновление всех пунктов пропуска, возвращает итоги цикла"""
     keydb_manager = KeyDBManager(host=keydb_host, port=keydb_port, password=keydb_password)
+    # Цикл профилируется, только если это запрошено (env, сигнал или флаг в KeyDB)
+    with cycle_profiler.profile_cycle(keydb_manager):
+        return run_update_cycle(keydb_manager)
+
+def run_update_cycle(keydb_manager: KeyDBManager) -> Dict:
+    """Один цикл обновления всех пунктов пропуска"""
+    parser = CheckpointWebParser(html_archive=HtmlArchive.from_env())
+    memory_budget = MemoryBudget.from_env()
     
     # Читаем ссылки из файла
     links = read_links_from_file('links.txt')
     
     if not links:
-        print("❌ Не найдено ссылок для обработки")
-        return
+        logger.error("Не найдено ссылок для обработки")
+        return {'successful': 0, 'skipped': 0, 'failed': 0, 'total': 0}
+    
+    # По отдельным ссылкам на уровне INFO пишем только прогресс раз в N ссылок
+    progress_every = max(1, int(os.getenv('PARSER_LOG_PROGRESS_EVERY', '10')))
+    # Пункты, успешно обновленные не раньше чем fresh_seconds назад, не загружаем повторно
+    fresh_seconds = float(os.getenv('PARSER_FRESH_SECONDS', '300'))
+    # Основная информация разбирается заново не чаще раза в N секунд (0 - в каждом цикле)
+    info_refresh_seconds = float(os.getenv('PARSER_INFO_REFRESH_SECONDS', str(6 * 3600)))
+    cycle_started = time.monotonic()
     
-    print(f"Найдено {len(links)} ссылок для обработки")
-    print(f"Время начала: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print()
+    # Продолжаем прерванный цикл, если список ссылок не изменился
+    links_hash = hashlib.sha1('\n'.join(links).encode('utf-8')).hexdigest()
+    cycle_state = keydb_manager.get_cycle_state()
+    resume_from = 0
+    if cycle_state.get('status') == 'running' and cycle_state.get('links_hash') == links_hash:
+        resume_from = int(cycle_state.get('next_index', 0))
+        logger.info("Продолжение прерванного цикла", extra={
+            'cycle_started': cycle_state.get('cycle_started', ''),
+            'resume_from': resume_from
+        })
+    else:
+        keydb_manager.save_cycle_state({
+            'cycle_started': datetime.now().isoformat(),
+            'links_hash': links_hash,
+            'next_index': 0,
+            'status': 'running'
+        }, reset=True)
+    logger.info("Начало обновления пунктов пропуска", extra={'links': len(links)})
     
     # Результаты обработки
     successful = 0
     failed = 0
+    skipped = 0
     
     # Обрабатываем каждую ссылку
     for i, url in enumerate(links, 1):
+        if i <= resume_from:
+            skipped += 1
+            continue
+        
+        # Загрузки идут последовательно: ждать освобождения памяти бессмысленно,
+        # при нехватке просто пропускаем архив HTML для этой страницы
+        archive_html = memory_budget.check_headroom()
+        
+        fetched = True
         try:
-            result = process_single_checkpoint(parser, keydb_manager, url, i, len(links))
+            result = process_single_checkpoint(parser, keydb_manager, url, i, len(links), fresh_seconds,
+                                               info_refresh_seconds, archive_html)
             
-            if result.get('success'):
+            if result.get('skipped'):
+                skipped += 1
+                fetched = result['skipped'] != 'fresh'
+            elif result.get('success'):
                 successful += 1
             else:
                 failed += 1
                 
         except Exception as e:
-            print(f"❌ Критическая ошибка при обработке {url}: {e}")
+            logger.error("Критическая ошибка при обработке", extra={'url': url, 'error': str(e)})
             failed += 1
         
+        # Результат уже сохранен в KeyDB, в памяти его не держим
+        result = None
+        keydb_manager.save_cycle_state({'next_index': i})
+        
+        if i % progress_every == 0 and i < len(links):
+            logger.info("Прогресс обновления", extra={
+                'processed': i,
+                'total': len(links),
+                'successful': successful,
+                'skipped': skipped,
+                'failed': failed
+            })
+        
         # Небольшая пауза между запросами
-        if i < len(links):
-            print("⏳ Пауза 2 секунды...")
+        if fetched and i < len(links):
             time.sleep(2)
     
+    keydb_manager.save_cycle_state({'status': 'completed', 'cycle_finished': datetime.now().isoformat()})
+    
+    # Удаляем пункты, убранные из links.txt или с истекшими данными
+    if os.getenv('PARSER_SWEEP_ORPHANS', '1') == '1':
+        live_ids = {keydb_manager.extract_checkpoint_id(link) for link in links} - {''}
+        swept = keydb_manager.sweep_orphans(live_ids, batch_size=int(os.getenv('PARSER_SWEEP_BATCH_SIZE', '100')))
+        if swept['removed']:
+            logger.info("Удалены устаревшие пункты пропуска", extra=swept)
+    
+    # Бинарный снимок для локальных читателей (отчеты, сайдкары)
+    snapshot_path = os.getenv('PARSER_SNAPSHOT_PATH', '')
+    if snapshot_path and keydb_manager.is_connected():
+        try:
+            written = write_snapshot(snapshot_path, keydb_manager.iter_checkpoints())
+            logger.info("Снимок пунктов пропуска записан", extra={'path': snapshot_path, **written})
+        except Exception as e:
+            logger.error("Ошибка записи снимка", extra={'path': snapshot_path, 'error': str(e)})
+    
     # Итоговая статистика
-    print("\n" + "=" * 60)
-    print("📊 ИТОГОВАЯ СТАТИСТИКА ОБНОВЛЕНИЯ")
-    print("=" * 60)
-    print(f"✅ Успешно обработано: {successful}")
-    print(f"❌ Ошибок: {failed}")
-    print(f"📊 Всего ссылок: {len(links)}")
-    print(f"Время завершения: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    # Показываем сводную статистику из KeyDB
+    usage = memory_budget.usage()
+    logger.info("Обновление завершено", extra={
+        'successful': successful,
+        'skipped': skipped,
+        'failed': failed,
+        'total': len(links),
+        'duration_s': round(time.monotonic() - cycle_started, 1),
+        'rss_mb': round(usage['rss_bytes'] / 1024 / 1024, 1),
+        'memory_pressure': memory_budget.pressure_count
+    })
+    
+    # Чистим архив HTML по сроку хранения
+    if parser.html_archive is not None:
+        try:
+            pruned = parser.html_archive.prune()
+            if pruned is not None:
+                logger.info("Архив HTML очищен", extra=pruned)
+        except Exception as e:
+            logger.warning("Ошибка очистки архива HTML", extra={'error': str(e)})
+    
+    # Сводная статистика из KeyDB
     if keydb_manager.is_connected():
         summary_stats = keydb_manager.get_summary_stats()
         if summary_stats:
-            print(f"\n📈 СВОДНАЯ СТАТИСТИКА ИЗ KEYDB:")
-            print(f"- Всего пунктов пропуска: {summary_stats.get('total_checkpoints', 0)}")
-            print(f"- Общее количество рабочих дней: {summary_stats.get('total_working_days', 0)}")
-            print(f"- Общее количество выходных: {summary_stats.get('total_holidays', 0)}")
-            print(f"- Среднее по всем пунктам за 1 МРП: {summary_stats.get('avg_1mrp_overall', 0)}")
-            print(f"- Среднее по всем пунктам за 100 МРП: {summary_stats.get('avg_100mrp_overall', 0)}")
+            logger.info("Сводная статистика из KeyDB", extra={
+                'total_checkpoints': summary_stats.get('total_checkpoints', 0),
+                'total_working_days': summary_stats.get('total_working_days', 0),
+                'total_holidays': summary_stats.get('total_holidays', 0),
+                'avg_1mrp_overall': summary_stats.get('avg_1mrp_overall', 0),
+                'avg_100mrp_overall': summary_stats.get('avg_100mrp_overall', 0)
+            })
+    
+    return {'successful': successful, 'skipped': skipped, 'failed': failed, 'total': len(links)}
 
 def run_scheduler(keydb_host='localhost', keydb_port=6379, keydb_password=None):
     """Запуск планировщика"""
-    print("⏰ Планировщик запущен. Обновление каждые 7 минут...")
+    import schedule
+    
+    logger.info("Планировщик запущен, обновление каждые 7 минут")
+    cycle_profiler.install_signal_handler()
     
     # Планируем обновление каждые 7 минут
     schedule.every(7).minutes.do(update_all_checkpoints, keydb_host, keydb_port, keydb_password)
     
     # Первое обновление сразу
-    print("🚀 Выполняем первое обновление...")
     update_all_checkpoints(keydb_host, keydb_port, keydb_password)
     
     # Запускаем планировщик
@@ -610,30 +1444,26 @@ def run_scheduler(keydb_host='localhost', keydb_port=6379, keydb_password=None):
         time.sleep(1)
 
 def main():
-    print("Парсер пунктов пропуска CGR с KeyDB")
-    print("=" * 50)
+    setup_logging()
     
     # Получаем настройки из переменных окружения
     keydb_host = os.getenv('KEYDB_HOST', 'localhost')
     keydb_port = int(os.getenv('KEYDB_PORT', '6379'))
     keydb_password = os.getenv('KEYDB_PASSWORD', None)
     
-    print(f"🔗 Подключение к KeyDB: {keydb_host}:{keydb_port}")
+    logger.info("Парсер пунктов пропуска CGR с KeyDB", extra={'host': keydb_host, 'port': keydb_port})
     
     # Проверяем подключение к KeyDB
     keydb_manager = KeyDBManager(host=keydb_host, port=keydb_port, password=keydb_password)
     
     if not keydb_manager.is_connected():
-        print("❌ Не удалось подключиться к KeyDB!")
-        print("Убедитесь, что KeyDB запущен на localhost:6379")
+        logger.error("Не удалось подключиться к KeyDB")
         return
     
-    print("✅ KeyDB подключен успешно")
-    print("🔄 Запуск автоматического обновления каждые 7 минут...")
-    print("Для остановки нажмите Ctrl+C")
-    print()
-    
     try:
+        # Сигнал профилирования обрабатывается только главным потоком
+        cycle_profiler.install_signal_handler()
+        
         # Запускаем планировщик в отдельном потоке
         scheduler_thread = threading.Thread(target=run_scheduler, args=(keydb_host, keydb_port, keydb_password), daemon=True)
         scheduler_thread.start()
@@ -643,8 +1473,7 @@ def main():
             time.sleep(1)
             
     except KeyboardInterrupt:
-        print("\n🛑 Остановка парсера...")
-        print("👋 До свидания!")
+        logger.info("Остановка парсера")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
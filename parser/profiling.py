@@ -0,0 +1,155 @@
+"""
+Профилирование циклов обновления по запросу.
+
+Профилирование включается без правки кода и перезапуска:
+    PARSER_PROFILE_CYCLES=N         - профилировать первые N циклов после запуска
+    kill -USR1 <pid>                - профилировать следующие PARSER_PROFILE_SIGNAL_CYCLES циклов (1)
+    SET parser:profile N (в KeyDB)  - профилировать следующие N циклов (флаг снимается парсером)
+
+Цикл выполняется под cProfile и tracemalloc. В PARSER_PROFILE_DIR
+(по умолчанию logs/profiles) сохраняются файлы с отметкой времени:
+    cycle-<ts>.pstats      - для pstats / snakeviz
+    cycle-<ts>.tracemalloc - снимок аллокаций (tracemalloc.Snapshot.load)
+    cycle-<ts>.txt         - короткий отчет: горячие функции и строки с аллокациями
+
+Когда профилирование не запрошено, цикл выполняется как обычно:
+cProfile и tracemalloc не импортируются и не включаются.
+"""
+
+import logging
+import os
+import signal
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator
+
+logger = logging.getLogger('checkpoint_parser.profiling')
+
+
+class CycleProfiler:
+    """Профилировщик следующих N циклов обновления"""
+
+    def __init__(self, output_dir: str = 'logs/profiles', cycles: int = 0, signal_cycles: int = 1,
+                 top: int = 25, tracemalloc_frames: int = 5):
+        self.output_dir = output_dir
+        self.pending = max(0, cycles)
+        self.signal_cycles = max(1, signal_cycles)
+        self.top = top
+        self.tracemalloc_frames = tracemalloc_frames
+
+    @classmethod
+    def from_env(cls) -> 'CycleProfiler':
+        """Профилировщик из переменных окружения"""
+        return cls(
+            output_dir=os.getenv('PARSER_PROFILE_DIR', 'logs/profiles'),
+            cycles=int(os.getenv('PARSER_PROFILE_CYCLES', '0')),
+            signal_cycles=int(os.getenv('PARSER_PROFILE_SIGNAL_CYCLES', '1')),
+            top=int(os.getenv('PARSER_PROFILE_TOP', '25')),
+            tracemalloc_frames=int(os.getenv('PARSER_PROFILE_TRACEMALLOC_FRAMES', '5')),
+        )
+
+    def request(self, cycles: int, source: str):
+        """Запрос профилирования следующих циклов"""
+        if cycles <= 0:
+            return
+        self.pending = max(self.pending, cycles)
+        logger.info("Запрошено профилирование", extra={'cycles': cycles, 'source': source})
+
+    def install_signal_handler(self, signum: int = getattr(signal, 'SIGUSR1', 0)):
+        """Обработчик сигнала (устанавливается только из главного потока)"""
+        if not signum or threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signum, self.handle_signal)
+
+    def handle_signal(self, signum, frame):
+        # В обработчике сигнала только меняем счетчик, без логирования
+        self.pending = max(self.pending, self.signal_cycles)
+
+    def poll_keydb(self, keydb_manager):
+        """Проверка флага parser:profile в KeyDB (одна команда на цикл)"""
+        if keydb_manager is None:
+            return
+        cycles = keydb_manager.pop_profile_request()
+        if cycles:
+            self.request(cycles, 'keydb')
+
+    @contextmanager
+    def profile_cycle(self, keydb_manager=None) -> Iterator[None]:
+        """Выполнение цикла под профилировщиком, если оно запрошено"""
+        self.poll_keydb(keydb_manager)
+        if self.pending <= 0:
+            yield
+            return
+
+        import cProfile
+        import tracemalloc
+
+        self.pending -= 1
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(self.tracemalloc_frames)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                self.write_results(profile, snapshot)
+            except Exception as e:
+                logger.error("Ошибка сохранения профиля", extra={'error': str(e)})
+
+    def write_results(self, profile, snapshot) -> Dict[str, str]:
+        """Сохранение pstats, снимка аллокаций и текстового отчета"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"cycle-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        paths = {
+            'pstats': f"{base}.pstats",
+            'tracemalloc': f"{base}.tracemalloc",
+            'report': f"{base}.txt",
+        }
+
+        profile.dump_stats(paths['pstats'])
+        snapshot.dump(paths['tracemalloc'])
+        report, hot_functions = build_report(paths['pstats'], snapshot, self.top)
+        with open(paths['report'], 'w', encoding='utf-8') as f:
+            f.write(report)
+
+        logger.info("Профиль цикла сохранен", extra={
+            **paths,
+            'hot_functions': '; '.join(hot_functions[:5]),
+            'cycles_left': self.pending
+        })
+        return paths
+
+
+def build_report(pstats_path: str, snapshot, top: int = 25):
+    """Текстовый отчет по профилю и список самых горячих функций"""
+    import io
+    import pstats
+
+    stream = io.StringIO()
+    stats = pstats.Stats(pstats_path, stream=stream)
+    stats.strip_dirs()
+
+    stream.write(f"Всего вызовов: {stats.total_calls}, время: {stats.total_tt:.3f} с\n")
+    stream.write("\n=== Собственное время (tottime) ===\n")
+    stats.sort_stats('tottime').print_stats(top)
+    stream.write("\n=== Накопленное время (cumulative) ===\n")
+    stats.sort_stats('cumulative').print_stats(top)
+
+    stream.write("\n=== Аллокации по строкам (tracemalloc) ===\n")
+    for statistic in snapshot.statistics('lineno')[:top]:
+        stream.write(f"{statistic}\n")
+
+    by_tottime = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    hot_functions = [f"{name} ({filename}:{line}) {values[2]:.3f}s"
+                     for (filename, line, name), values in by_tottime[:top]]
+    return stream.getvalue(), hot_functions
+
+
+cycle_profiler = CycleProfiler.from_env()
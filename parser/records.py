@@ -0,0 +1,141 @@
+"""
+Компактные типизированные записи для распарсенных данных пункта пропуска.
+
+Формат словарей/JSON (to_dict) совпадает с прежним выводом парсера,
+поэтому KeyDB, API и JSON-выгрузки не меняются.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass(slots=True)
+class DayLoad:
+    """Загруженность пункта пропуска за один день"""
+    index: int
+    date_text: Optional[str] = None
+    date: Optional[str] = None
+    is_holiday: Optional[bool] = None
+    available_1mrp: Optional[int] = None
+    available_100mrp: Optional[int] = None
+    load_level: Optional[int] = None
+    background_color: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DayLoad':
+        """Создание записи из словаря (например, прочитанного из KeyDB)"""
+        return cls(
+            index=int(data.get('index', 0)),
+            date_text=data.get('date_text'),
+            date=data.get('date'),
+            is_holiday=data.get('is_holiday'),
+            available_1mrp=data.get('available_1mrp'),
+            available_100mrp=data.get('available_100mrp'),
+            load_level=data.get('load_level'),
+            background_color=data.get('background_color'),
+        )
+
+    def to_dict(self) -> Dict:
+        """Словарь в прежнем формате: только заполненные поля"""
+        data = {'index': self.index}
+        if self.date_text is not None:
+            data['date_text'] = self.date_text
+        if self.date is not None:
+            data['date'] = self.date
+        if self.is_holiday is not None:
+            data['is_holiday'] = self.is_holiday
+        if self.available_1mrp is not None:
+            data['available_1mrp'] = self.available_1mrp
+        if self.available_100mrp is not None:
+            data['available_100mrp'] = self.available_100mrp
+        if self.load_level is not None:
+            data['load_level'] = self.load_level
+        if self.background_color is not None:
+            data['background_color'] = self.background_color
+        return data
+
+
+@dataclass(slots=True)
+class LoadStatistics:
+    """Статистика загруженности, считаемая за один проход по дням"""
+    total_days: int = 0
+    working_days: int = 0
+    holidays: int = 0
+    sum_1mrp: int = 0
+    sum_100mrp: int = 0
+    max_1mrp: Optional[int] = None
+    min_1mrp: Optional[int] = None
+    max_100mrp: Optional[int] = None
+    min_100mrp: Optional[int] = None
+
+    def add(self, day: DayLoad):
+        """Учет одного дня"""
+        self.total_days += 1
+        if day.is_holiday:
+            self.holidays += 1
+            return
+
+        self.working_days += 1
+        value_1mrp = day.available_1mrp or 0
+        value_100mrp = day.available_100mrp or 0
+        self.sum_1mrp += value_1mrp
+        self.sum_100mrp += value_100mrp
+
+        if self.max_1mrp is None:
+            self.max_1mrp = self.min_1mrp = value_1mrp
+            self.max_100mrp = self.min_100mrp = value_100mrp
+            return
+
+        if value_1mrp > self.max_1mrp:
+            self.max_1mrp = value_1mrp
+        elif value_1mrp < self.min_1mrp:
+            self.min_1mrp = value_1mrp
+        if value_100mrp > self.max_100mrp:
+            self.max_100mrp = value_100mrp
+        elif value_100mrp < self.min_100mrp:
+            self.min_100mrp = value_100mrp
+
+    def to_dict(self) -> Dict:
+        """Словарь статистики в прежнем формате"""
+        stats = {
+            'total_days': self.total_days,
+            'working_days': self.working_days,
+            'holidays': self.holidays
+        }
+        if self.working_days:
+            stats['avg_1mrp'] = round(self.sum_1mrp / self.working_days, 1)
+            stats['avg_100mrp'] = round(self.sum_100mrp / self.working_days, 1)
+            stats['max_1mrp'] = self.max_1mrp
+            stats['min_1mrp'] = self.min_1mrp
+            stats['max_100mrp'] = self.max_100mrp
+            stats['min_100mrp'] = self.min_100mrp
+        return stats
+
+
+@dataclass(slots=True)
+class CheckpointSnapshot:
+    """Результат парсинга одной страницы пункта пропуска"""
+    url: str
+    basic_info: Dict = field(default_factory=dict)
+    load_data: List[DayLoad] = field(default_factory=list)
+    parsed_at: str = ''
+    statistics: LoadStatistics = field(default_factory=LoadStatistics)
+
+    @classmethod
+    def build(cls, url: str, basic_info: Dict, load_data: List[DayLoad], parsed_at: str) -> 'CheckpointSnapshot':
+        """Создание снимка со статистикой, посчитанной за один проход"""
+        statistics = LoadStatistics()
+        for day in load_data:
+            statistics.add(day)
+        return cls(url=url, basic_info=basic_info, load_data=load_data,
+                   parsed_at=parsed_at, statistics=statistics)
+
+    def to_dict(self) -> Dict:
+        """Словарь в формате parse_html_content"""
+        return {
+            'url': self.url,
+            'basic_info': self.basic_info,
+            'load_data': [day.to_dict() for day in self.load_data],
+            'parsed_at': self.parsed_at,
+            'statistics': self.statistics.to_dict()
+        }
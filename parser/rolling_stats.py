@@ -0,0 +1,230 @@
+"""
+Скользящая статистика загруженности пункта пропуска.
+
+Обновляется в каждом цикле за O(1) и не требует истории; для неизмененных
+страниц подается сохраненное значение, так что статистика взвешена по
+времени, а не по числу изменений:
+    EWMA и экспоненциальная дисперсия метрики
+    скользящие min/max за окно (кольцо часовых корзин)
+    потоковые перцентили (алгоритм P², 5 маркеров на квантиль)
+    частота изменений данных (доля циклов с изменениями, интервал между ними)
+
+Состояние метрики хранится в хэше checkpoint:{id}:trend одним полем
+компактного JSON-массива, рядом пишутся готовые значения для чтения
+без разбора состояния (avg_1mrp_ewma, avg_1mrp_p90, ...).
+
+Переменные окружения:
+    PARSER_TREND_ALPHA         - коэффициент EWMA (по умолчанию 0.2)
+    PARSER_TREND_WINDOW_HOURS  - окно min/max в часах (по умолчанию 24)
+"""
+
+import hashlib
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Метрики из statistics, по которым ведется скользящая статистика
+TREND_METRICS = ('avg_1mrp', 'avg_100mrp')
+TREND_QUANTILES = (0.5, 0.9)
+
+DEFAULT_ALPHA = float(os.getenv('PARSER_TREND_ALPHA', '0.2'))
+DEFAULT_WINDOW_HOURS = int(os.getenv('PARSER_TREND_WINDOW_HOURS', '24'))
+
+
+class P2Quantile:
+    """Оценка квантиля алгоритмом P² (Jain, Chlamtac): постоянная память, O(1) на значение"""
+
+    __slots__ = ('p', 'heights', 'positions', 'desired')
+
+    def __init__(self, p: float, state: Optional[List[float]] = None):
+        self.p = p
+        self.heights: List[float] = []
+        self.positions: List[float] = []
+        self.desired: List[float] = []
+        if state:
+            # Первые значения до инициализации маркеров хранятся как есть
+            if len(state) == 15:
+                self.heights, self.positions, self.desired = state[:5], state[5:10], state[10:]
+            else:
+                self.heights = list(state)
+
+    def increments(self) -> List[float]:
+        p = self.p
+        return [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(x)
+            heights.sort()
+            if len(heights) == 5:
+                p = self.p
+                self.positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+                self.desired = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+            return
+
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = 0
+            while k < 3 and x >= heights[k + 1]:
+                k += 1
+
+        positions = self.positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i, increment in enumerate(self.increments()):
+            self.desired[i] += increment
+
+        for i in (1, 2, 3):
+            delta = self.desired[i] - positions[i]
+            if ((delta >= 1 and positions[i + 1] - positions[i] > 1)
+                    or (delta <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if delta > 0 else -1
+                candidate = self.parabolic(i, step)
+                if not heights[i - 1] < candidate < heights[i + 1]:
+                    candidate = self.linear(i, step)
+                heights[i] = candidate
+                positions[i] += step
+
+    def parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def linear(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    def value(self) -> Optional[float]:
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            # Пока значений мало - точный квантиль по отсортированным значениям
+            index = min(len(self.heights) - 1, max(0, math.ceil(self.p * len(self.heights)) - 1))
+            return self.heights[index]
+        return self.heights[2]
+
+    def state(self) -> List[float]:
+        if len(self.heights) < 5:
+            return list(self.heights)
+        return self.heights + self.positions + self.desired
+
+
+class RollingMetric:
+    """Скользящая статистика одной метрики"""
+
+    __slots__ = ('count', 'last', 'ewma', 'ewvar', 'quantiles', 'buckets')
+
+    def __init__(self, state: Optional[List] = None):
+        # Состояние: [count, last, ewma, ewvar, [квантили], [[час, min, max], ...]]
+        state = state or [0, None, None, 0.0, [], []]
+        self.count = int(state[0])
+        self.last = state[1]
+        self.ewma = state[2]
+        self.ewvar = float(state[3])
+        quantile_states = state[4] if len(state[4]) == len(TREND_QUANTILES) else [None] * len(TREND_QUANTILES)
+        self.quantiles = [P2Quantile(p, quantile_state)
+                          for p, quantile_state in zip(TREND_QUANTILES, quantile_states)]
+        self.buckets = [list(bucket) for bucket in state[5]]
+
+    def update(self, value: float, now: datetime, alpha: float = DEFAULT_ALPHA,
+               window_hours: int = DEFAULT_WINDOW_HOURS):
+        self.count += 1
+        self.last = value
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            # Экспоненциально взвешенные среднее и дисперсия (West, 1979)
+            diff = value - self.ewma
+            increment = alpha * diff
+            self.ewma += increment
+            self.ewvar = (1 - alpha) * (self.ewvar + diff * increment)
+
+        for quantile in self.quantiles:
+            quantile.add(value)
+
+        # Кольцо часовых корзин: обновляется текущая, устаревшие отбрасываются
+        hour = int(now.timestamp() // 3600)
+        self.buckets = [bucket for bucket in self.buckets if bucket[0] > hour - window_hours]
+        if self.buckets and self.buckets[-1][0] == hour:
+            bucket = self.buckets[-1]
+            bucket[1] = min(bucket[1], value)
+            bucket[2] = max(bucket[2], value)
+        else:
+            self.buckets.append([hour, value, value])
+
+    def rolling_min(self) -> Optional[float]:
+        return min((bucket[1] for bucket in self.buckets), default=None)
+
+    def rolling_max(self) -> Optional[float]:
+        return max((bucket[2] for bucket in self.buckets), default=None)
+
+    def state(self) -> List:
+        return [self.count, self.last, self.ewma, round(self.ewvar, 6),
+                [quantile.state() for quantile in self.quantiles], self.buckets]
+
+    def summary(self, prefix: str) -> Dict:
+        """Готовые значения для хэша trend"""
+        values = {
+            f"{prefix}_ewma": self.ewma,
+            f"{prefix}_ewstd": math.sqrt(self.ewvar) if self.count > 1 else 0.0,
+            f"{prefix}_min": self.rolling_min(),
+            f"{prefix}_max": self.rolling_max(),
+        }
+        for quantile in self.quantiles:
+            values[f"{prefix}_p{round(quantile.p * 100)}"] = quantile.value()
+        return {key: round(value, 2) for key, value in values.items() if value is not None}
+
+
+def load_fingerprint(load_data: List[Dict]) -> str:
+    """Короткий отпечаток доступности по дням для подсчета изменений"""
+    digest = hashlib.blake2b(digest_size=8)
+    for day in load_data:
+        digest.update(f"{day.get('date')}|{day.get('available_1mrp')}|{day.get('available_100mrp')};".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def update_trend(trend: Dict, statistics: Dict, load_data: Optional[List[Dict]], serializer,
+                 now: Optional[datetime] = None) -> Dict:
+    """
+    Новые поля хэша trend по прежнему состоянию и данным текущего цикла.
+
+    Для неизмененной страницы load_data=None: метрики обновляются сохраненными
+    значениями, отпечаток и счетчик изменений не трогаются. Счетчик циклов
+    (cycles) увеличивается отдельно через HINCRBY; частота изменений
+    считается при чтении как changes / cycles.
+    """
+    now = now or datetime.now()
+    mapping = {}
+
+    for metric in TREND_METRICS:
+        value = statistics.get(metric)
+        if value is None:
+            continue
+        state = serializer.loads(trend[metric]) if trend.get(metric) else None
+        rolling = RollingMetric(state)
+        rolling.update(float(value), now)
+        mapping[metric] = serializer.dumps(rolling.state())
+        mapping.update(rolling.summary(metric))
+
+    if load_data is None:
+        return mapping
+
+    fingerprint = load_fingerprint(load_data)
+    if fingerprint != trend.get('fingerprint'):
+        mapping['fingerprint'] = fingerprint
+        mapping['changes'] = int(trend.get('changes', 0)) + 1
+        if trend.get('last_change'):
+            interval = (now - datetime.fromisoformat(trend['last_change'])).total_seconds()
+            previous = float(trend.get('change_interval_ewma') or interval)
+            mapping['change_interval_ewma'] = round(previous + DEFAULT_ALPHA * (interval - previous), 1)
+        mapping['last_change'] = now.isoformat()
+
+    return mapping
@@ -0,0 +1,79 @@
+"""
+Сериализация данных парсера (значения KeyDB, JSON-файлы).
+
+Используется orjson, если он установлен, иначе стандартный json.
+Оба бэкенда пишут компактный JSON без экранирования кириллицы:
+Go API читает load_data через json.Unmarshal, поэтому бинарные
+форматы (msgpack и т.п.) для значений KeyDB не подходят.
+
+Бэкенд можно выбрать переменной окружения PARSER_SERIALIZER
+(auto, json, orjson).
+"""
+
+import json
+import logging
+import os
+from typing import Any, IO, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger('checkpoint_parser.serializer')
+
+
+class JsonSerializer:
+    """Сериализатор на стандартном json"""
+
+    name = 'json'
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    def loads(self, data: Any) -> Any:
+        return json.loads(data)
+
+    def dump_file(self, obj: Any, f: IO[str], indent: Optional[int] = None):
+        json.dump(obj, f, ensure_ascii=False, indent=indent)
+
+
+class OrjsonSerializer:
+    """Сериализатор на orjson"""
+
+    name = 'orjson'
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, data: Any) -> Any:
+        return orjson.loads(data)
+
+    def dump_file(self, obj: Any, f: IO[str], indent: Optional[int] = None):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            # orjson поддерживает только отступ в 2 пробела
+            option |= orjson.OPT_INDENT_2
+        f.write(orjson.dumps(obj, option=option).decode('utf-8'))
+
+
+SERIALIZERS = {
+    'json': JsonSerializer,
+    'orjson': OrjsonSerializer,
+}
+
+
+def get_serializer(name: Optional[str] = None):
+    """Получение сериализатора по имени (auto - самый быстрый доступный)"""
+    name = name or os.getenv('PARSER_SERIALIZER', 'auto')
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    if name == 'orjson' and orjson is None:
+        logger.warning("orjson не установлен, используется стандартный json")
+        name = 'json'
+    if name not in SERIALIZERS:
+        raise ValueError(f"Неизвестный сериализатор: {name}")
+    return SERIALIZERS[name]()
+
+
+default_serializer = get_serializer()
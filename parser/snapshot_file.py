@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Компактный бинарный снимок всех пунктов пропуска для локальных читателей.
+
+Парсер пишет снимок в конце каждого цикла (PARSER_SNAPSHOT_PATH), а
+отчеты и сайдкары читают его через mmap без обращений к KeyDB и без
+разбора JSON. Файл заменяется атомарно (запись во временный файл,
+fsync, os.replace): читатель видит либо старый, либо новый снимок.
+
+Формат (little-endian, только стандартная библиотека):
+
+    заголовок   HEADER: magic, версия, количество пунктов, время создания,
+                смещение индекса, CRC32 всего, что после заголовка
+    записи      по одной на пункт пропуска:
+                RECORD (статистика, координаты, число дней, длины строк),
+                строки UTF-8 (name_ru, border_country, status, last_updated),
+                DAY * число дней
+    индекс      INDEX_ENTRY (id, смещение записи, длина) по возрастанию id
+
+Поиск по id - бинарный поиск по индексу прямо в отображенном файле,
+день пункта читается одним struct.unpack_from по вычисленному смещению.
+
+Пример:
+    python snapshot_file.py /app/logs/checkpoints.snapshot 224749863825000000
+"""
+
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'CPSNAP\x00\x01'
+FORMAT_VERSION = 1
+
+# magic, version, reserved, count, created_at, index_offset, crc32
+HEADER = struct.Struct('<8sHHIdQI')
+# total_days, working_days, holidays, avg_1mrp, avg_100mrp,
+# max_1mrp, min_1mrp, max_100mrp, min_100mrp, latitude, longitude,
+# day_count, длины строк name_ru, border_country, status, last_updated
+RECORD = struct.Struct('<HHHffiiiiddHHHHH')
+# index, date (ordinal, 0 - нет), is_holiday (-1 - нет), load_level, available_1mrp, available_100mrp
+DAY = struct.Struct('<HIbbii')
+# id, offset, length
+INDEX_ENTRY = struct.Struct('<QQI')
+
+STRING_FIELDS = ('name_ru', 'border_country', 'status', 'last_updated')
+MISSING_INT = -1
+
+
+def to_int(value, default: int = MISSING_INT) -> int:
+    """Целое из значения KeyDB (строки) или default"""
+    if value is None or value == '':
+        return default
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def to_float(value) -> float:
+    """Число из значения KeyDB (строки) или NaN"""
+    if value is None or value == '':
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def encode_record(checkpoint: Dict) -> bytes:
+    """Запись пункта пропуска в формате RECORD + строки + дни"""
+    basic_info = checkpoint.get('basic_info') or {}
+    stats = checkpoint.get('statistics') or {}
+    meta = checkpoint.get('metadata') or {}
+    load_data = checkpoint.get('load_data') or []
+
+    strings = [
+        (basic_info.get('name_ru') or '').encode('utf-8'),
+        (basic_info.get('border_country') or '').encode('utf-8'),
+        (basic_info.get('status') or '').encode('utf-8'),
+        (meta.get('last_updated') or '').encode('utf-8'),
+    ]
+
+    parts = [RECORD.pack(
+        to_int(stats.get('total_days'), 0),
+        to_int(stats.get('working_days'), 0),
+        to_int(stats.get('holidays'), 0),
+        to_float(stats.get('avg_1mrp')),
+        to_float(stats.get('avg_100mrp')),
+        to_int(stats.get('max_1mrp')),
+        to_int(stats.get('min_1mrp')),
+        to_int(stats.get('max_100mrp')),
+        to_int(stats.get('min_100mrp')),
+        to_float(basic_info.get('latitude')),
+        to_float(basic_info.get('longitude')),
+        len(load_data),
+        *(len(value) for value in strings),
+    )]
+    parts.extend(strings)
+
+    for position, day in enumerate(load_data):
+        is_holiday = day.get('is_holiday')
+        parts.append(DAY.pack(
+            to_int(day.get('index'), position),
+            date.fromisoformat(day['date']).toordinal() if day.get('date') else 0,
+            MISSING_INT if is_holiday is None else int(bool(is_holiday)),
+            to_int(day.get('load_level')),
+            to_int(day.get('available_1mrp')),
+            to_int(day.get('available_100mrp')),
+        ))
+    return b''.join(parts)
+
+
+def write_snapshot(path: str, checkpoints: Iterable[Dict]) -> Dict:
+    """
+    Потоковая запись снимка с атомарной заменой файла.
+
+    Записи пишутся сразу по мере чтения, в памяти держится только индекс.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+
+    index: List[Tuple[int, int, int]] = []
+    crc = 0
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\x00' * HEADER.size)
+        offset = HEADER.size
+        for checkpoint in checkpoints:
+            checkpoint_id = str(checkpoint.get('checkpoint_id', ''))
+            # В индексе id хранится как uint64
+            if not checkpoint_id.isdigit() or int(checkpoint_id) >= 1 << 64:
+                continue
+            record = encode_record(checkpoint)
+            f.write(record)
+            crc = zlib.crc32(record, crc)
+            index.append((int(checkpoint_id), offset, len(record)))
+            offset += len(record)
+
+        index.sort()
+        index_bytes = b''.join(INDEX_ENTRY.pack(*entry) for entry in index)
+        f.write(index_bytes)
+        crc = zlib.crc32(index_bytes, crc)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(index), time.time(), offset, crc))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    return {'checkpoints': len(index), 'bytes': offset + len(index_bytes)}
+
+
+class SnapshotReader:
+    """Чтение снимка через mmap с поиском пункта пропуска по id"""
+
+    def __init__(self, path: str, verify: bool = False):
+        self.path = path
+        self._mmap = None
+        self._stat = None
+        self.open(verify)
+
+    def open(self, verify: bool = False):
+        import mmap
+
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count, created_at, index_offset, crc = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            mapped.close()
+            raise ValueError(f"Неизвестный формат снимка: {self.path}")
+        if verify and zlib.crc32(memoryview(mapped)[HEADER.size:]) != crc:
+            mapped.close()
+            raise ValueError(f"Снимок поврежден (CRC): {self.path}")
+
+        self.close()
+        self._mmap = mapped
+        self._stat = stat
+        self.count = count
+        self.created_at = created_at
+        self.index_offset = index_offset
+
+    def refresh(self) -> bool:
+        """Переоткрытие, если парсер записал новый снимок"""
+        stat = os.stat(self.path)
+        if (stat.st_ino, stat.st_mtime_ns) == (self._stat.st_ino, self._stat.st_mtime_ns):
+            return False
+        self.open()
+        return True
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Снаружи еще живут memoryview из record_view: отображение освободит GC
+                pass
+            self._mmap = None
+
+    def __enter__(self) -> 'SnapshotReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, checkpoint_id) -> bool:
+        return self.find(checkpoint_id) is not None
+
+    def index_entry(self, position: int) -> Tuple[int, int, int]:
+        return INDEX_ENTRY.unpack_from(self._mmap, self.index_offset + position * INDEX_ENTRY.size)
+
+    def ids(self) -> Iterator[str]:
+        """ID пунктов пропуска по возрастанию"""
+        for position in range(self.count):
+            yield str(self.index_entry(position)[0])
+
+    def find(self, checkpoint_id) -> Optional[Tuple[int, int]]:
+        """Смещение и длина записи (бинарный поиск по индексу)"""
+        try:
+            key = int(checkpoint_id)
+        except (TypeError, ValueError):
+            return None
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_id, offset, length = self.index_entry(middle)
+            if entry_id < key:
+                low = middle + 1
+            elif entry_id > key:
+                high = middle
+            else:
+                return offset, length
+        return None
+
+    def record_view(self, checkpoint_id) -> Optional[memoryview]:
+        """Запись пункта без копирования (memoryview над mmap, освобождать через release())"""
+        location = self.find(checkpoint_id)
+        if location is None:
+            return None
+        offset, length = location
+        return memoryview(self._mmap)[offset:offset + length]
+
+    def read_header(self, offset: int) -> Tuple[tuple, int]:
+        """Поля RECORD и смещение первого дня"""
+        fields = RECORD.unpack_from(self._mmap, offset)
+        return fields, offset + RECORD.size + sum(fields[-len(STRING_FIELDS):])
+
+    def get_day(self, checkpoint_id, day_index: int) -> Optional[Dict]:
+        """Один день пункта пропуска без разбора остальной записи"""
+        location = self.find(checkpoint_id)
+        if location is None:
+            return None
+        fields, days_offset = self.read_header(location[0])
+        if not 0 <= day_index < fields[11]:
+            return None
+        return decode_day(DAY.unpack_from(self._mmap, days_offset + day_index * DAY.size))
+
+    def get(self, checkpoint_id) -> Optional[Dict]:
+        """Пункт пропуска в формате KeyDBManager.get_checkpoint_data (значения типизированы)"""
+        location = self.find(checkpoint_id)
+        if location is None:
+            return None
+        offset = location[0]
+        fields, days_offset = self.read_header(offset)
+        (total_days, working_days, holidays, avg_1mrp, avg_100mrp, max_1mrp, min_1mrp,
+         max_100mrp, min_100mrp, latitude, longitude, day_count) = fields[:12]
+
+        strings = {}
+        position = offset + RECORD.size
+        for name, length in zip(STRING_FIELDS, fields[12:]):
+            strings[name] = self._mmap[position:position + length].decode('utf-8')
+            position += length
+
+        basic_info = {name: strings[name] for name in ('name_ru', 'border_country', 'status')}
+        if not math.isnan(latitude) and not math.isnan(longitude):
+            basic_info['latitude'] = latitude
+            basic_info['longitude'] = longitude
+
+        statistics = {'total_days': total_days, 'working_days': working_days, 'holidays': holidays}
+        if working_days:
+            statistics.update({
+                'avg_1mrp': round(avg_1mrp, 1), 'avg_100mrp': round(avg_100mrp, 1),
+                'max_1mrp': max_1mrp, 'min_1mrp': min_1mrp,
+                'max_100mrp': max_100mrp, 'min_100mrp': min_100mrp,
+            })
+
+        return {
+            'checkpoint_id': str(checkpoint_id),
+            'basic_info': basic_info,
+            'statistics': statistics,
+            'load_data': [decode_day(DAY.unpack_from(self._mmap, days_offset + i * DAY.size))
+                          for i in range(day_count)],
+            'metadata': {'last_updated': strings['last_updated']},
+        }
+
+
+def decode_day(values: tuple) -> Dict:
+    """День из DAY в формате load_data (только заполненные поля)"""
+    index, ordinal, is_holiday, load_level, available_1mrp, available_100mrp = values
+    day = {'index': index}
+    if ordinal:
+        day['date'] = date.fromordinal(ordinal).isoformat()
+    if is_holiday != MISSING_INT:
+        day['is_holiday'] = bool(is_holiday)
+    if available_1mrp != MISSING_INT:
+        day['available_1mrp'] = available_1mrp
+    if available_100mrp != MISSING_INT:
+        day['available_100mrp'] = available_100mrp
+    if load_level != MISSING_INT:
+        day['load_level'] = load_level
+    return day
+
+
+def main(argv=None) -> int:
+    import json
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Использование: python snapshot_file.py <снимок> [id пункта пропуска]", file=sys.stderr)
+        return 2
+
+    with SnapshotReader(argv[0], verify=True) as reader:
+        if len(argv) > 1:
+            data = reader.get(argv[1])
+            if data is None:
+                print(f"Пункт пропуска {argv[1]} не найден", file=sys.stderr)
+                return 1
+            print(json.dumps(data, ensure_ascii=False, indent=2))
+        else:
+            print(json.dumps({
+                'checkpoints': len(reader),
+                'created_at': reader.created_at,
+                'ids': list(reader.ids())
+            }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())